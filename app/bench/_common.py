@@ -0,0 +1,17 @@
+# app/bench/_common.py
+"""Setup shared by the benches: a migrated database with the system agent."""
+from __future__ import annotations
+
+from app.infra.db.connection import Database
+from app.infra.db.schema_version import MIGRATIONS_DIR, apply_migrations
+
+NOW = "2026-01-01T00:00:00+00:00"
+
+
+async def prepare(db: Database) -> None:
+    """Apply the app's migrations and add the 'system' agent jobs are created under."""
+    await apply_migrations(db, str(MIGRATIONS_DIR), NOW)
+    await db.execute(
+        "INSERT INTO agents(agent_id, name, category, is_active, created_at) VALUES ('system', 'System', 'core', 1, ?);",
+        (NOW,),
+    )
@@ -0,0 +1,95 @@
+# app/bench/due_index.py
+"""
+list_due on the ISO text column vs the integer due_at_ms column.
+
+  python -m app.bench.due_index [rows] [limit]
+
+Seeds scheduled_jobs-shaped rows whose due_at is written with mixed
+offsets ('+00:00', 'Z', '+02:00'), as the bot used to, indexes both
+columns and times the same range scan + ORDER BY ... LIMIT through each
+index. Also counts how many rows the text comparison gets wrong.
+"""
+from __future__ import annotations
+
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.domain.common.time import iso_to_epoch_ms
+
+_OFFSETS = (timezone.utc, timezone(timedelta(hours=2)))
+
+
+def _seed(conn: sqlite3.Connection, n: int) -> datetime:
+    conn.executescript(
+        """
+        CREATE TABLE scheduled_jobs (
+          job_id TEXT PRIMARY KEY, status TEXT, due_at TEXT, due_at_ms INTEGER, payload_json TEXT
+        );
+        CREATE INDEX idx_due_text ON scheduled_jobs(status, due_at);
+        CREATE INDEX idx_due_ms ON scheduled_jobs(status, due_at_ms);
+        """
+    )
+    rnd = random.Random(7)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(n):
+        dt = (base + timedelta(seconds=rnd.randrange(30 * 86400))).astimezone(rnd.choice(_OFFSETS))
+        iso = dt.isoformat()
+        if i % 3 == 0 and dt.utcoffset() == timedelta(0):
+            iso = iso.replace("+00:00", "Z")
+        status = "pending" if i % 4 else "done"
+        rows.append((f"job-{i}", status, iso, iso_to_epoch_ms(iso), '{"title": "x"}'))
+    conn.executemany("INSERT INTO scheduled_jobs VALUES (?, ?, ?, ?, ?);", rows)
+    conn.execute("ANALYZE;")
+    return base + timedelta(days=15)
+
+
+def _time_us(conn: sqlite3.Connection, sql: str, params: tuple, reps: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        t = time.perf_counter()
+        for _ in range(reps):
+            conn.execute(sql, params).fetchall()
+        best = min(best, (time.perf_counter() - t) / reps)
+    return best * 1e6
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    conn = sqlite3.connect(":memory:")
+    now = _seed(conn, n)
+    now_iso, now_ms = now.isoformat(), iso_to_epoch_ms(now.isoformat())
+
+    text_sql = (
+        "SELECT job_id, payload_json FROM scheduled_jobs INDEXED BY idx_due_text "
+        "WHERE status = 'pending' AND due_at <= ? ORDER BY due_at LIMIT ?;"
+    )
+    ms_sql = (
+        "SELECT job_id, payload_json FROM scheduled_jobs INDEXED BY idx_due_ms "
+        "WHERE status = 'pending' AND due_at_ms <= ? ORDER BY due_at_ms LIMIT ?;"
+    )
+    count_text = "SELECT COUNT(*) FROM scheduled_jobs WHERE status = 'pending' AND due_at <= ?;"
+    count_ms = "SELECT COUNT(*) FROM scheduled_jobs WHERE status = 'pending' AND due_at_ms <= ?;"
+
+    print(f"{n} rows, LIMIT {limit}")
+    cases = (
+        ("text due_at", text_sql, count_text.replace("WHERE", "INDEXED BY idx_due_text WHERE"), now_iso),
+        ("int due_at_ms", ms_sql, count_ms.replace("WHERE", "INDEXED BY idx_due_ms WHERE"), now_ms),
+    )
+    for name, sql, count_sql, param in cases:
+        # LIMIT: what the scheduler runs; COUNT: the bare index range scan, no row lookups
+        print(f"{name:<14} LIMIT {_time_us(conn, sql, (param, limit), 2000):9.1f} us/query")
+        print(f"{name:<14} COUNT {_time_us(conn, count_sql, (param,), 20):9.1f} us/query")
+
+    wrong = abs(conn.execute(count_text, (now_iso,)).fetchone()[0] - conn.execute(count_ms, (now_ms,)).fetchone()[0])
+    first_text = [r[0] for r in conn.execute(text_sql, (now_iso, limit))]
+    first_ms = [r[0] for r in conn.execute(ms_sql, (now_ms, limit))]
+    print(f"due set differs by {wrong} rows; first {limit} differ in {len(set(first_text) ^ set(first_ms)) // 2} rows")
+
+
+if __name__ == "__main__":
+    main()
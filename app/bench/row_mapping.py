@@ -0,0 +1,165 @@
+# app/bench/row_mapping.py
+"""
+Per-row cost of mapping scheduled_jobs / worklog_entries rows.
+
+  python -m app.bench.row_mapping [rows]
+
+Compares the old path (aiosqlite.Row + string-keyed lookups + eager
+json.loads / from_iso) with the positional mappers. scheduled_jobs rows
+decode payload/schedule lazily, so they are timed both untouched (list
+rendering) and with every field read; worklog rows decode eagerly.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from app.domain.common.time import from_iso
+from app.domain.oppari.models import WorklogEntry
+from app.infra.db.repo.oppari_sqlite import _ENTRY_SELECT, _entry_mapper
+from app.infra.db.repo.scheduled_jobs_sqlite import _JOB_SELECT, _job_mapper
+
+
+@dataclass(frozen=True)
+class _LegacyScheduledJob:
+    job_id: str
+    user_id: int
+    agent_id: str
+    job_type: str
+    schedule_kind: str
+    schedule: dict[str, Any]
+    payload: dict[str, Any]
+    status: str
+    due_at: str
+    created_at: str
+    updated_at: str
+    run_count: int
+    last_run_at: Optional[str]
+    last_error: Optional[str]
+    completed_at: Optional[str]
+
+
+def _legacy_job(row) -> _LegacyScheduledJob:
+    # ScheduledJobsRepo._row_to_job before compiled mappers
+    schedule = json.loads(row["schedule_json"]) if row["schedule_json"] else {}
+    payload = json.loads(row["payload_json"]) if row["payload_json"] else {}
+    return _LegacyScheduledJob(
+        job_id=row["job_id"],
+        user_id=int(row["user_id"]),
+        agent_id=row["agent_id"],
+        job_type=row["job_type"],
+        schedule_kind=row["schedule_kind"],
+        schedule=schedule,
+        payload=payload,
+        status=row["status"],
+        due_at=row["due_at"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        run_count=int(row["run_count"] or 0),
+        last_run_at=row["last_run_at"],
+        last_error=row["last_error"],
+        completed_at=row["completed_at"],
+    )
+
+
+def _legacy_entry(row) -> WorklogEntry:
+    # OppariSqliteRepo._row_to_entry before compiled mappers
+    meta_raw = row["metadata_json"]
+    metadata = json.loads(meta_raw) if meta_raw else {}
+    return WorklogEntry(
+        entry_id=row["entry_id"],
+        user_id=row["user_id"],
+        agent_id=row["agent_id"],
+        start_at=from_iso(row["start_at"]),
+        end_at=from_iso(row["end_at"]) if row["end_at"] else None,
+        break_minutes=int(row["break_minutes"] or 0),
+        description=row["description"],
+        metadata=metadata,
+        created_at=from_iso(row["created_at"]),
+        updated_at=from_iso(row["updated_at"]),
+    )
+
+
+def _seed(conn: sqlite3.Connection, n: int) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE scheduled_jobs (
+          job_id TEXT PRIMARY KEY, user_id INTEGER, agent_id TEXT, job_type TEXT,
+          schedule_kind TEXT, schedule_json TEXT, payload_json TEXT, status TEXT,
+          due_at TEXT, due_at_ms INTEGER, completed_at TEXT, run_count INTEGER, last_run_at TEXT,
+          last_error TEXT, created_at TEXT, updated_at TEXT,
+          title TEXT GENERATED ALWAYS AS (json_extract(payload_json, '$.title')) VIRTUAL,
+          chat_id INTEGER GENERATED ALWAYS AS (json_extract(payload_json, '$.chat_id')) VIRTUAL
+        );
+        CREATE TABLE worklog_entries (
+          entry_id TEXT PRIMARY KEY, user_id INTEGER, agent_id TEXT, project TEXT,
+          category TEXT, start_at TEXT, end_at TEXT, break_minutes INTEGER,
+          description TEXT, metadata_json TEXT, created_at TEXT, updated_at TEXT
+        );
+        """
+    )
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    jobs, entries = [], []
+    for i in range(n):
+        ts = (base + timedelta(minutes=i)).isoformat()
+        payload = json.dumps({"title": f"Tehtävä {i}", "chat_id": 1000 + i}, ensure_ascii=False)
+        jobs.append((f"job-{i}", 1, "system", "todo", "once", None, payload, "pending",
+                     ts, i * 60_000, None, 0, None, None, ts, ts))
+        entries.append((f"e-{i}", 1, "opp", None, None, ts, ts, 15, f"work {i}",
+                        json.dumps({"learned": "x" * 40}), ts, ts))
+    conn.executemany(f"INSERT INTO scheduled_jobs VALUES ({','.join('?' * 16)});", jobs)
+    conn.executemany(f"INSERT INTO worklog_entries VALUES ({','.join('?' * 12)});", entries)
+
+
+def _touch_job(job) -> None:
+    job.payload, job.schedule  # noqa: B018
+
+
+def _touch_entry(e) -> None:
+    e.start_at, e.end_at, e.metadata, e.created_at, e.updated_at  # noqa: B018
+
+
+def _per_row_us(conn: sqlite3.Connection, sql: str, row_factory, fn: Callable, touch: Callable | None, n: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        cur = conn.cursor()
+        cur.row_factory = row_factory
+        started = time.perf_counter()
+        objs = [fn(r) for r in cur.execute(sql)]
+        if touch is not None:
+            for o in objs:
+                touch(o)
+        best = min(best, time.perf_counter() - started)
+    return best / n * 1e6
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    conn = sqlite3.connect(":memory:")
+    _seed(conn, n)
+
+    job_sql = f"SELECT {_JOB_SELECT} FROM scheduled_jobs;"
+    entry_sql = f"SELECT {_ENTRY_SELECT} FROM worklog_entries;"
+    ident = lambda r: r  # noqa: E731
+
+    cases = [
+        ("scheduled_jobs", "legacy Row lookups", job_sql, sqlite3.Row, _legacy_job, None),
+        ("scheduled_jobs", "compiled, untouched", job_sql, _job_mapper, ident, None),
+        ("scheduled_jobs", "compiled, all fields", job_sql, _job_mapper, ident, _touch_job),
+        ("worklog_entries", "legacy, all fields", entry_sql, sqlite3.Row, _legacy_entry, _touch_entry),
+        ("worklog_entries", "positional, all fields", entry_sql, _entry_mapper, ident, _touch_entry),
+    ]
+
+    print(f"rows per query: {n}")
+    print(f"{'table':<16} {'path':<22} {'us/row':>8}")
+    for table, label, sql, factory, fn, touch in cases:
+        print(f"{table:<16} {label:<22} {_per_row_us(conn, sql, factory, fn, touch, n):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# app/bench/shard_writes.py
+"""
+Write throughput vs. shard count.
+
+  python -m app.bench.shard_writes [users] [writes_per_user] [shard counts...]
+
+Every simulated user awaits its own inserts one after another (like a
+chat user), all users concurrently. Each shard has its own writer task and
+SQLite write lock, so commits on different shards proceed in parallel.
+Within one process the event loop usually caps throughput before the
+write lock does; shards could pay off when commits are fsync-bound or a
+shard's lock is held by long transactions.
+
+Measured here: 4657 / 4524 / 4547 writes/s at 1 / 2 / 4 shards, i.e. no
+gain, which is why DB_SHARDS stays at 1 for the bot.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.bench._common import NOW, prepare
+from app.infra.db.repo.sharded import ShardedOppariRepo, ShardedScheduledJobsRepo
+from app.infra.db.sharding import ShardedDatabase, shard_paths
+
+
+async def _run(shard_count: int, users: int, per_user: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = shard_paths(Path(tmp) / "bench.db", shard_count)
+        shards = ShardedDatabase([str(p) for p in paths])
+        try:
+            for db in shards.shards:
+                await prepare(db)
+            for uid in range(1, users + 1):
+                await shards.for_user(uid).execute(
+                    "INSERT INTO users(user_id, created_at, last_seen_at) VALUES (?, ?, ?);", (uid, NOW, NOW)
+                )
+            jobs = ShardedScheduledJobsRepo(shards)
+            opp = ShardedOppariRepo(shards)
+
+            async def user(uid: int) -> None:
+                for i in range(per_user):
+                    # one read-then-write transaction + one group-committed insert
+                    await opp.ensure_user(uid, NOW)
+                    await jobs.create_todo(f"{uid}:{i}", uid, "system", f"todo {i}", uid, NOW, NOW)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(user(uid) for uid in range(1, users + 1)))
+            return 2 * users * per_user / (time.perf_counter() - started)
+        finally:
+            await shards.close()
+
+
+def main() -> None:
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    counts = [int(a) for a in sys.argv[3:]] or [1, 2, 4]
+    for n in counts:
+        rate = asyncio.run(_run(n, users, per_user))
+        print(f"{n} shard(s): {rate:10.0f} writes/s")
+
+
+if __name__ == "__main__":
+    main()
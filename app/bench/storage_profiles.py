@@ -0,0 +1,82 @@
+# app/bench/storage_profiles.py
+"""
+Repo workload under each storage profile.
+
+  python -m app.bench.storage_profiles [users] [ops_per_user] [dir]
+
+Each simulated user runs a todo-list session against ScheduledJobsRepo:
+add a todo, render the list, mark one done, render again. All users run
+concurrently against a fresh database per profile (created in `dir`, so
+point it at the disk the bot uses). The in-memory row is the floor: what
+the code costs without any I/O.
+"""
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.bench._common import NOW, prepare
+from app.infra.db.connection import Database
+from app.infra.db.profiles import PROFILES
+from app.infra.db.repo.scheduled_jobs_sqlite import ScheduledJobsRepo
+
+
+async def _run(db: Database, users: int, ops: int) -> tuple[float, list[float]]:
+    try:
+        await prepare(db)
+        await db.executemany(
+            "INSERT INTO users(user_id, created_at, last_seen_at) VALUES (?, ?, ?);",
+            [(uid, NOW, NOW) for uid in range(1, users + 1)],
+        )
+        repo = ScheduledJobsRepo(db)
+        latencies: list[float] = []
+
+        async def timed(coro) -> None:
+            t = time.perf_counter()
+            await coro
+            latencies.append((time.perf_counter() - t) * 1000.0)
+
+        async def session(uid: int) -> None:
+            for i in range(ops):
+                job_id = f"{uid}:{i}"
+                await timed(repo.create_todo(job_id, uid, "system", f"todo {i}", uid, NOW, NOW))
+                await timed(repo.list_pending_todos_for_user(uid, limit=50))
+                if i % 2:
+                    await timed(repo.mark_done_for_user(job_id, uid, NOW))
+                    await timed(repo.list_pending_todos_for_user(uid, limit=50))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(session(uid) for uid in range(1, users + 1)))
+        return time.perf_counter() - started, latencies
+    finally:
+        await db.close()
+
+
+def _report(name: str, elapsed: float, latencies: list[float]) -> None:
+    q = statistics.quantiles(latencies, n=100, method="inclusive")
+    print(
+        f"{name:<11} {len(latencies) / elapsed:10.0f} ops/s   "
+        f"p50 {q[49]:7.2f} ms   p99 {q[98]:7.2f} ms   max {max(latencies):7.2f} ms"
+    )
+
+
+def main() -> None:
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    base: Optional[str] = sys.argv[3] if len(sys.argv) > 3 else None
+
+    print(f"{users} users x {ops} sessions")
+    for profile in PROFILES.values():
+        with tempfile.TemporaryDirectory(dir=base) as tmp:
+            db = Database(str(Path(tmp) / "bench.db"), profile=profile)
+            _report(profile.name, *asyncio.run(_run(db, users, ops)))
+    _report("in-memory", *asyncio.run(_run(Database.in_memory(), users, ops)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# app/bench/todo_mutations.py
+"""
+Todo button taps: SELECT-then-UPDATE transaction vs one UPDATE ... RETURNING.
+
+  python -m app.bench.todo_mutations [taps] [concurrency] [dir]
+
+Runs `taps` mark-done taps each way against a fresh on-disk database
+(created in `dir`), first one at a time, then `concurrency` at once, and
+reports latency / throughput and the number of jobs the write
+connection's thread ran per tap (one job = one round trip from the event
+loop into SQLite).
+
+A lone tap commits without waiting for stragglers (the writer only holds
+a window open while writes overlap), so the single statement wins both
+one at a time and under concurrency. One run, 300 taps, concurrency 32:
+
+  concurrency 1    select + update   p50 0.57 ms   1482 taps/s
+                   update returning  p50 0.32 ms   2495 taps/s
+  concurrency 32   select + update   p50 7.78 ms   1987 taps/s
+                   update returning  p50 2.04 ms  14242 taps/s
+"""
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.bench._common import NOW, prepare
+from app.infra.db.connection import Database
+from app.infra.db.repo.scheduled_jobs_sqlite import JobSpec, ScheduledJobsRepo
+
+USER = 1
+
+
+async def _two_step_done(db: Database, job_id: str) -> bool:
+    # mark_done_for_user before single-statement mutations
+    async with db.transaction() as tx:
+        row = await tx.fetchone(
+            "SELECT job_id FROM scheduled_jobs WHERE job_id=? AND user_id=? AND status='pending';",
+            (job_id, USER),
+        )
+        if not row:
+            return False
+        await tx.execute(
+            "UPDATE scheduled_jobs SET status='done', completed_at=?, updated_at=? WHERE job_id=? AND user_id=?;",
+            (NOW, NOW, job_id, USER),
+        )
+        return True
+
+
+def _write_jobs(db: Database) -> int:
+    return db.pool_stats()["write"].thread_jobs
+
+
+async def _measure(
+    db: Database, job_ids: list[str], tap: Callable[[str], Awaitable[bool]], concurrency: int
+) -> tuple[list[float], float, float]:
+    """Returns (per-tap latencies in ms, taps/s, write-thread jobs per tap)."""
+    latencies = []
+
+    async def one(job_id: str) -> None:
+        t = time.perf_counter()
+        assert await tap(job_id)
+        latencies.append((time.perf_counter() - t) * 1000.0)
+
+    jobs_before = _write_jobs(db)
+    started = time.perf_counter()
+    for i in range(0, len(job_ids), concurrency):
+        await asyncio.gather(*(one(j) for j in job_ids[i : i + concurrency]))
+    elapsed = time.perf_counter() - started
+    return latencies, len(job_ids) / elapsed, (_write_jobs(db) - jobs_before) / len(job_ids)
+
+
+async def _run(path: str, taps: int, concurrency: int) -> None:
+    db = Database(path)
+    try:
+        await prepare(db)
+        await db.execute("INSERT INTO users(user_id, created_at, last_seen_at) VALUES (?, ?, ?);", (USER, NOW, NOW))
+        repo = ScheduledJobsRepo(db)
+        all_ids = [f"todo-{i}" for i in range(4 * taps)]
+        await repo.create_many(
+            [JobSpec(i, USER, "system", "todo", "manual", None, payload={"title": i}) for i in all_ids], NOW
+        )
+        ids = iter(all_ids)
+
+        cases = (
+            ("select + update", lambda j: _two_step_done(db, j)),
+            ("update returning", lambda j: repo.mark_done_for_user(j, USER, NOW)),
+        )
+        for conc in (1, concurrency):
+            print(f"concurrency {conc}")
+            for name, tap in cases:
+                job_ids = [next(ids) for _ in range(taps)]
+                latencies, rate, hops = await _measure(db, job_ids, tap, conc)
+                q = statistics.quantiles(latencies, n=100, method="inclusive")
+                print(
+                    f"  {name:<17} p50 {q[49]:6.2f} ms   p99 {q[98]:6.2f} ms   "
+                    f"{rate:7.0f} taps/s   {hops:4.2f} round trips/tap"
+                )
+    finally:
+        await db.close()
+
+
+def main() -> None:
+    taps = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    base: Optional[str] = sys.argv[3] if len(sys.argv) > 3 else None
+    with tempfile.TemporaryDirectory(dir=base) as tmp:
+        asyncio.run(_run(str(Path(tmp) / "bench.db"), taps, concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,12 @@ class Settings:
     owner_telegram_id: int
     timezone: str
     db_path: Path
+    db_shards: int
+    db_profile: str
+    backup_dir: Path
+    backup_keep: int
+    backup_interval_minutes: int
+    maintenance_interval_minutes: int
 
 
 def load_settings() -> Settings:
@@ -22,6 +28,12 @@ def load_settings() -> Settings:
     owner_id = int(os.getenv("OWNER_TELEGRAM_ID", "0").strip())
     tz = os.getenv("TZ", "Europe/Helsinki").strip()
     db_raw = os.getenv("DB_PATH", "data/lifeops.db").strip()
+    db_shards = int(os.getenv("DB_SHARDS", "1").strip())
+    db_profile = os.getenv("DB_PROFILE", "durable").strip().lower()
+    backup_raw = os.getenv("BACKUP_DIR", "data/backups").strip()
+    backup_keep = int(os.getenv("BACKUP_KEEP", "7").strip())
+    backup_interval = int(os.getenv("BACKUP_INTERVAL_MINUTES", "1440").strip())
+    maintenance_interval = int(os.getenv("MAINTENANCE_INTERVAL_MINUTES", "60").strip())
 
     if not bot_token:
         raise RuntimeError("BOT_TOKEN missing in .env")
@@ -34,4 +46,10 @@ def load_settings() -> Settings:
         owner_telegram_id=owner_id,
         timezone=tz,
         db_path=Path(db_raw),
+        db_shards=max(db_shards, 1),
+        db_profile=db_profile,
+        backup_dir=Path(backup_raw),
+        backup_keep=backup_keep,
+        backup_interval_minutes=backup_interval,
+        maintenance_interval_minutes=maintenance_interval,
     )
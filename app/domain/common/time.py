@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 def ensure_aware(dt: datetime) -> datetime:
@@ -18,3 +18,14 @@ def to_iso(dt: datetime) -> str:
 def from_iso(s: str) -> datetime:
     # Python can parse ISO with offset via fromisoformat
     return datetime.fromisoformat(s)
+
+
+def iso_to_epoch_ms(s: str) -> int:
+    """
+    UTC epoch milliseconds of an ISO timestamp (any offset, or `Z`).
+    Naive values are taken as UTC, like SQLite's julianday().
+    """
+    dt = from_iso(s)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return round(dt.timestamp() * 1000)
@@ -0,0 +1,174 @@
+# app/infra/db/backup.py
+from __future__ import annotations
+
+import asyncio
+import gzip
+import logging
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.infra.db.repo.scheduled_jobs_sqlite import ScheduledJob
+
+log = logging.getLogger(__name__)
+
+BACKUP_JOB_TYPE = "db_backup"
+
+
+@dataclass(frozen=True)
+class BackupConfig:
+    directory: Path
+    keep: int = 7
+    pages_per_step: int = 256
+    step_pause_s: float = 0.005
+    compress: bool = True
+    # give up (and free the lock) if one backup runs longer than this
+    max_duration_s: float = 300.0
+
+
+@dataclass(frozen=True)
+class BackupResult:
+    path: Path
+    size_bytes: int
+    pages: int
+    elapsed_ms: float
+    removed: list[Path] = field(default_factory=list)
+
+
+class BackupService:
+    """
+    Online backups through the SQLite backup API.
+
+    The copy runs in a worker thread in steps of `pages_per_step` pages with
+    a short pause between steps, so neither the event loop nor the writer is
+    blocked while it runs (WAL readers don't block writers). The source
+    connection holds one read transaction for the whole copy: the backup
+    reads that fixed snapshot instead of restarting every time another
+    connection commits, which under steady writes it would do forever.
+    A run over `max_duration_s` is aborted with TimeoutError. Snapshots are
+    written as `<db stem>-<UTC timestamp with ms>.db[.gz]` (plus `-<n>` if
+    that name is taken); only the newest `keep` are retained. Files are
+    built under a `.part` name and renamed when complete, so an unfinished
+    one is never listed, kept or restored.
+    """
+
+    def __init__(self, db_path: str, cfg: BackupConfig) -> None:
+        self._db_path = db_path
+        self._cfg = cfg
+        self._lock = asyncio.Lock()
+
+    @property
+    def _stem(self) -> str:
+        return Path(self._db_path).stem
+
+    async def run_job(self, job: ScheduledJob) -> None:
+        """JobRunner entry point for BACKUP_JOB_TYPE."""
+        res = await self.backup()
+        log.info(
+            "db backup %s: %d bytes, %d pages in %.0f ms, removed %d old",
+            res.path.name, res.size_bytes, res.pages, res.elapsed_ms, len(res.removed),
+        )
+
+    async def backup(self, now: datetime | None = None) -> BackupResult:
+        # one backup at a time, even if a slow run overlaps the next tick
+        async with self._lock:
+            now = now or datetime.now(timezone.utc)
+            return await asyncio.to_thread(self._backup_sync, now)
+
+    def _backup_sync(self, now: datetime) -> BackupResult:
+        cfg = self._cfg
+        cfg.directory.mkdir(parents=True, exist_ok=True)
+        raw_path = self._snapshot_path(now)
+        tmp_path = raw_path.with_name(raw_path.name + ".part")
+
+        started = time.perf_counter()
+        pages = 0
+
+        def _progress(status: int, remaining: int, total: int) -> None:
+            nonlocal pages
+            pages = total
+            # raising here makes sqlite3 finish the backup handle and re-raise
+            if time.perf_counter() - started > cfg.max_duration_s:
+                raise TimeoutError(f"db backup did not finish within {cfg.max_duration_s:g} s")
+
+        src = sqlite3.connect(self._db_path, isolation_level=None)
+        dst = sqlite3.connect(tmp_path)
+        done = False
+        try:
+            # pin one WAL snapshot: BEGIN is deferred, the first read starts it
+            src.execute("BEGIN;")
+            src.execute("SELECT COUNT(*) FROM sqlite_schema;").fetchone()
+            src.backup(dst, pages=cfg.pages_per_step, progress=_progress, sleep=cfg.step_pause_s)
+            done = True
+        finally:
+            dst.close()
+            src.close()
+            if not done:
+                tmp_path.unlink(missing_ok=True)
+
+        if cfg.compress:
+            final_path = raw_path.with_name(raw_path.name + ".gz")
+            gz_tmp = final_path.with_name(final_path.name + ".part")
+            try:
+                with open(tmp_path, "rb") as fin, gzip.open(gz_tmp, "wb", compresslevel=6) as fout:
+                    shutil.copyfileobj(fin, fout, length=1024 * 1024)
+                gz_tmp.replace(final_path)
+            finally:
+                gz_tmp.unlink(missing_ok=True)
+                tmp_path.unlink(missing_ok=True)
+        else:
+            final_path = raw_path
+            tmp_path.replace(final_path)
+
+        removed = self._apply_retention()
+        return BackupResult(
+            path=final_path,
+            size_bytes=final_path.stat().st_size,
+            pages=pages,
+            elapsed_ms=(time.perf_counter() - started) * 1000.0,
+            removed=removed,
+        )
+
+    def _snapshot_path(self, now: datetime) -> Path:
+        """Uncompressed snapshot path for `now`, unique even within one millisecond."""
+        now = now.astimezone(timezone.utc)
+        stamp = now.strftime("%Y%m%dT%H%M%S") + f"{now.microsecond // 1000:03d}Z"
+        base = f"{self._stem}-{stamp}"
+        name, n = base, 0
+        while any(
+            (self._cfg.directory / f"{name}.db{ext}").exists() for ext in ("", ".part", ".gz", ".gz.part")
+        ):
+            n += 1
+            name = f"{base}-{n}"
+        return self._cfg.directory / f"{name}.db"
+
+    def _snapshots(self) -> list[Path]:
+        """Finished snapshots, oldest first (`.part` files are skipped)."""
+        snapshots = [
+            p for p in self._cfg.directory.glob(f"{self._stem}-*.db*") if p.name.endswith((".db", ".db.gz"))
+        ]
+        return sorted(snapshots, key=_snapshot_order)
+
+    def _apply_retention(self) -> list[Path]:
+        snapshots = self._snapshots()
+        excess = snapshots[: max(len(snapshots) - self._cfg.keep, 0)]
+        for p in excess:
+            p.unlink(missing_ok=True)
+        return excess
+
+    def list_snapshots(self) -> list[Path]:
+        if not self._cfg.directory.exists():
+            return []
+        return self._snapshots()
+
+
+def _snapshot_order(path: Path) -> tuple[str, int]:
+    # "<stem>-<stamp>[-<n>].db[.gz]" -> (stamp, n); stems may contain "-"
+    name = path.name.rsplit(".db", 1)[0]
+    stamp, _, n = name.rpartition("-")
+    if stamp.endswith("Z") and n.isdigit():
+        return stamp, int(n)
+    return name, 0
@@ -1,53 +1,390 @@
 # app/infra/db/connection.py
 from __future__ import annotations
 
-import aiosqlite
-from typing import Any, Iterable, Optional, Sequence
+import asyncio
+import gzip
+import sqlite3
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, Sequence, Union
+
+from app.infra.db.metrics import QueryMetrics
+from app.infra.db.pool import ConnectionPool, PoolStats
+from app.infra.db.profiles import DURABLE, StorageProfile
+from app.infra.db.retry import ContentionStats, RetryPolicy, call_site, run_with_retry
+from app.infra.db.rows import RowMapper
+from app.infra.db.worker import SqliteWorker
+from app.infra.db.writer import GroupCommitWriter, WriterStats
+
+
+# on-disk PRAGMAs come from the StorageProfile, applied once per pooled
+# connection, not once per statement.
+# shared-cache in-memory databases have no WAL; table locks are taken in
+# the shared cache and fail fast with SQLITE_LOCKED instead of waiting.
+# read_uncommitted keeps readers off those locks, so like WAL readers they
+# never block the writer (at the cost of seeing a batch before it commits)
+_MEMORY_WRITE_PRAGMAS = (
+    "PRAGMA foreign_keys=ON;",
+)
+_MEMORY_READ_PRAGMAS = (
+    "PRAGMA foreign_keys=ON;",
+    "PRAGMA query_only=ON;",
+    "PRAGMA read_uncommitted=ON;",
+)
+
+# (sql, params, elapsed_ms, wait_ms, rows, failed) -> None
+Observer = Callable[[str, Any, float, float, int, bool], None]
+
+
+def _ms_since(t: float) -> float:
+    return (time.perf_counter() - t) * 1000.0
+
+
+async def _fetch(
+    conn: SqliteWorker,
+    sql: str,
+    params: Sequence[Any],
+    mapper: Optional[RowMapper],
+    one: bool,
+    observe: Observer,
+    wait_ms: float = 0.0,
+) -> Any:
+    started = time.perf_counter()
+    rows: Any = None
+    try:
+        rows = await conn.fetch(sql, params, mapper, one)
+    except Exception:
+        observe(sql, params, _ms_since(started), wait_ms, 0, True)
+        raise
+    n = (1 if rows is not None else 0) if one else len(rows)
+    observe(sql, params, _ms_since(started), wait_ms, n, False)
+    return rows
+
+
+async def _stream(
+    conn: SqliteWorker,
+    sql: str,
+    params: Sequence[Any],
+    batch_size: int,
+    mapper: Optional[RowMapper],
+    observe: Observer,
+    wait_ms: float = 0.0,
+) -> AsyncIterator[list[Any]]:
+    # only time spent inside SQLite counts; consumer time between batches does not
+    busy_ms = 0.0
+    n = 0
+    failed = True
+    try:
+        started = time.perf_counter()
+        cur = await conn.open_cursor(sql, params, mapper)
+        try:
+            while True:
+                rows = await conn.fetchmany(cur, batch_size)
+                busy_ms += _ms_since(started)
+                if not rows:
+                    break
+                n += len(rows)
+                yield rows
+                started = time.perf_counter()
+        finally:
+            await conn.close_cursor(cur)
+        failed = False
+    finally:
+        observe(sql, params, busy_ms, wait_ms, n, failed)
+
+
+class Transaction:
+    """
+    One explicit write transaction on a pinned connection.
+
+    Exposes the same statement API as `Database`, so repositories can be
+    constructed with either. Obtain one via `Database.transaction()`.
+    """
+
+    def __init__(self, conn: SqliteWorker, observe: Observer) -> None:
+        self._conn = conn
+        self._observe = observe
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["Transaction"]:
+        # nested use joins the outer transaction
+        yield self
+
+    async def executescript(self, sql: str) -> None:
+        raise RuntimeError("executescript() commits implicitly; not allowed inside a transaction")
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> None:
+        started = time.perf_counter()
+        try:
+            rowcount = await self._conn.execute(sql, params)
+        except Exception:
+            self._observe(sql, params, _ms_since(started), 0.0, 0, True)
+            raise
+        self._observe(sql, params, _ms_since(started), 0.0, rowcount, False)
+
+    async def executemany(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> None:
+        seq_of_params = list(seq_of_params)
+        started = time.perf_counter()
+        try:
+            rowcount = await self._conn.executemany(sql, seq_of_params)
+        except Exception:
+            self._observe(sql, seq_of_params, _ms_since(started), 0.0, 0, True)
+            raise
+        self._observe(sql, seq_of_params, _ms_since(started), 0.0, rowcount, False)
+
+    async def execute_returning(
+        self, sql: str, params: Sequence[Any] = (), mapper: Optional[RowMapper] = None
+    ) -> list[Any]:
+        return await _fetch(self._conn, sql, params, mapper, False, self._observe)
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = (), mapper: Optional[RowMapper] = None) -> Any:
+        return await _fetch(self._conn, sql, params, mapper, True, self._observe)
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = (), mapper: Optional[RowMapper] = None) -> list[Any]:
+        return await _fetch(self._conn, sql, params, mapper, False, self._observe)
+
+    async def iterate_batches(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        batch_size: int = 500,
+        mapper: Optional[RowMapper] = None,
+    ) -> AsyncIterator[list[Any]]:
+        async for batch in _stream(self._conn, sql, params, batch_size, mapper, self._observe):
+            yield batch
+
+    async def iterate(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        batch_size: int = 500,
+        mapper: Optional[RowMapper] = None,
+    ) -> AsyncIterator[Any]:
+        async for batch in self.iterate_batches(sql, params, batch_size, mapper):
+            for row in batch:
+                yield row
 
 
 class Database:
     """
     Async SQLite helper:
-    - opens a new connection per operation (simple + safe)
-    - sets row_factory to aiosqlite.Row
-    - enables WAL + foreign keys
+    - keeps long-lived connections in two pools: one write connection and
+      a bounded set of `query_only` read connections; each connection is a
+      sqlite3 connection owned by its own worker thread (SqliteWorker), so
+      a Database runs on 1 + read_pool_size threads in total
+    - sets row_factory to sqlite3.Row (repos pass a compiled `mapper`
+      for a tuple-row fast path)
+    - enables WAL + foreign keys and the `profile`'s synchronous / cache /
+      mmap / checkpoint settings (once per connection)
+    - funnels all writes through a single writer task that group-commits
+      whatever arrives together (SQLite allows one writer anyway)
+    - serves fetchone/fetchall from the read pool, so under WAL reads never
+      queue behind the writer
+    - `transaction()` pins the write connection for multi-statement units
+      of work (one commit, atomic)
+    - records per-statement latency / rows / connection wait in `metrics`;
+      statements slower than `slow_ms` are logged with their query plan
+    - retries reads and whole write batches on SQLITE_BUSY with jittered
+      exponential backoff; lock errors are counted per call site in
+      `contention`
+
+    Call `close()` on shutdown to release the pooled connections.
+
+    `Database.in_memory()` gives the same API over a shared-cache in-memory
+    database (for tests and benchmarks): seed it with `apply_migrations` or
+    `load_snapshot`. It lives until `close()`.
     """
 
-    def __init__(self, path: str) -> None:
+    def __init__(
+        self,
+        path: str,
+        read_pool_size: int = 4,
+        slow_ms: float = 100.0,
+        retry: RetryPolicy = RetryPolicy(),
+        uri: bool = False,
+        profile: StorageProfile = DURABLE,
+    ) -> None:
         self._path = path
+        self.metrics = QueryMetrics(slow_ms=slow_ms)
+        self.contention = ContentionStats()
+        self._retry = retry
+        self.profile = profile
+
+        write_pragmas, read_pragmas = profile.write_pragmas(), profile.read_pragmas()
+        self._keepalive: Optional[sqlite3.Connection] = None
+        if uri and "mode=memory" in path:
+            write_pragmas, read_pragmas = _MEMORY_WRITE_PRAGMAS, _MEMORY_READ_PRAGMAS
+            # the database exists only while some connection to it is open;
+            # pooled connections come and go, this one stays
+            self._keepalive = sqlite3.connect(path, uri=True, check_same_thread=False)
+
+        self._write_pool = ConnectionPool(path, max_size=1, pragmas=write_pragmas, uri=uri)
+        self._read_pool = ConnectionPool(path, max_size=read_pool_size, pragmas=read_pragmas, uri=uri)
+        self._writer = GroupCommitWriter(
+            self._write_pool,
+            observe=self._observe,
+            retry=retry,
+            contention=self.contention,
+        )
+        self._plan_tasks: set[asyncio.Task] = set()
+
+    @classmethod
+    def in_memory(cls, name: Optional[str] = None, **kwargs: Any) -> "Database":
+        """Shared-cache in-memory database; `name` lets two Database objects share one."""
+        name = name or f"lifeops-{uuid.uuid4().hex}"
+        return cls(f"file:{name}?mode=memory&cache=shared", uri=True, **kwargs)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    async def load_snapshot(self, snapshot: Union[str, Path]) -> None:
+        """
+        Replace the in-memory contents with an on-disk database or a
+        `.db.gz` backup (see app.infra.db.backup), via the backup API.
+        Call before the database is in use.
+        """
+        if self._keepalive is None:
+            raise RuntimeError("load_snapshot() is only available for in-memory databases")
+        await asyncio.to_thread(self._load_snapshot_sync, Path(snapshot))
+
+    def _load_snapshot_sync(self, snapshot: Path) -> None:
+        if snapshot.suffix == ".gz":
+            image = bytearray(gzip.decompress(snapshot.read_bytes()))
+            if image[18:20] == b"\x02\x02":
+                image[18:20] = b"\x01\x01"  # WAL header -> rollback journal; memory images have no -wal
+            src = sqlite3.connect(":memory:")
+            src.deserialize(bytes(image))
+        else:
+            src = sqlite3.connect(f"{snapshot.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            src.backup(self._keepalive)
+        finally:
+            src.close()
+
+    def _observe(self, sql: str, params: Any, elapsed_ms: float, wait_ms: float, rows: int, failed: bool) -> None:
+        if not self.metrics.record(sql, elapsed_ms, wait_ms, rows, failed):
+            return
+        if isinstance(params, list) and params and isinstance(params[0], (tuple, list, dict)):
+            params = params[0]  # executemany: explain with the first parameter set
+        task = asyncio.get_running_loop().create_task(
+            self._capture_plan(sql, params, elapsed_ms, wait_ms, rows)
+        )
+        self._plan_tasks.add(task)
+        task.add_done_callback(self._plan_tasks.discard)
+
+    async def _capture_plan(self, sql: str, params: Any, elapsed_ms: float, wait_ms: float, rows: int) -> None:
+        plan: tuple[str, ...] = ()
+        if not sql.lstrip().upper().startswith(("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")):
+            try:
+                async with self._read_pool.connection() as conn:
+                    steps = await conn.fetch(f"EXPLAIN QUERY PLAN {sql}", params, None, False)
+                    plan = tuple(r[3] for r in steps)
+            except Exception as e:
+                plan = (f"<plan unavailable: {e}>",)
+        self.metrics.record_slow(sql, elapsed_ms, wait_ms, rows, plan)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Transaction]:
+        """
+        async with db.transaction() as tx:
+            await tx.fetchone(...)
+            await tx.execute(...)
+
+        Commits once on exit, rolls back on error. Inside the block use `tx`
+        only: statements sent to `db` would wait for this transaction to end.
+        """
+        async with self._writer.reserve() as conn:
+            yield Transaction(conn, self._observe)
 
     async def executescript(self, sql: str) -> None:
-        async with aiosqlite.connect(self._path) as db:
-            db.row_factory = aiosqlite.Row
-            await db.execute("PRAGMA journal_mode=WAL;")
-            await db.execute("PRAGMA foreign_keys=ON;")
-            await db.executescript(sql)
-            await db.commit()
+        await self._writer.submit("script", sql)
 
     async def execute(self, sql: str, params: Sequence[Any] = ()) -> None:
-        async with aiosqlite.connect(self._path) as db:
-            db.row_factory = aiosqlite.Row
-            await db.execute("PRAGMA foreign_keys=ON;")
-            await db.execute(sql, params)
-            await db.commit()
+        await self._writer.submit("execute", sql, params)
 
     async def executemany(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> None:
-        async with aiosqlite.connect(self._path) as db:
-            db.row_factory = aiosqlite.Row
-            await db.execute("PRAGMA foreign_keys=ON;")
-            await db.executemany(sql, seq_of_params)
-            await db.commit()
-
-    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[aiosqlite.Row]:
-        async with aiosqlite.connect(self._path) as db:
-            db.row_factory = aiosqlite.Row
-            await db.execute("PRAGMA foreign_keys=ON;")
-            cur = await db.execute(sql, params)
-            return await cur.fetchone()
-
-    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> list[aiosqlite.Row]:
-        async with aiosqlite.connect(self._path) as db:
-            db.row_factory = aiosqlite.Row
-            await db.execute("PRAGMA foreign_keys=ON;")
-            cur = await db.execute(sql, params)
-            return await cur.fetchall()
+        await self._writer.submit("many", sql, seq_of_params)
+
+    async def execute_returning(
+        self, sql: str, params: Sequence[Any] = (), mapper: Optional[RowMapper] = None
+    ) -> list[Any]:
+        """
+        Run a write with a RETURNING clause through the writer (batched and
+        retried like execute()) and return its rows, mapped like fetchall().
+        """
+        return await self._writer.submit("returning", sql, params, mapper)
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = (), mapper: Optional[RowMapper] = None) -> Any:
+        """
+        Returns a sqlite3.Row, or whatever `mapper` builds from the raw
+        tuple row (see app.infra.db.rows.compile_mapper).
+        """
+        return await self._read(sql, params, mapper, True)
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = (), mapper: Optional[RowMapper] = None) -> list[Any]:
+        return await self._read(sql, params, mapper, False)
+
+    async def _read(self, sql: str, params: Sequence[Any], mapper: Optional[RowMapper], one: bool) -> Any:
+        async def attempt() -> Any:
+            started = time.perf_counter()
+            async with self._read_pool.connection() as db:
+                return await _fetch(db, sql, params, mapper, one, self._observe, _ms_since(started))
+
+        return await run_with_retry(attempt, self._retry, self.contention, lambda: (call_site(),))
+
+    async def iterate_batches(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        batch_size: int = 500,
+        mapper: Optional[RowMapper] = None,
+    ) -> AsyncIterator[list[Any]]:
+        """
+        Stream a result set in lists of at most `batch_size` rows from one
+        open cursor, so memory stays bounded by the batch, not the table.
+
+        The read connection (and its WAL snapshot) is held until the
+        generator finishes; if you may stop early, close it explicitly:
+
+            async with contextlib.aclosing(db.iterate_batches(sql)) as it:
+                async for batch in it: ...
+        """
+        started = time.perf_counter()
+        async with self._read_pool.connection() as db:
+            async for batch in _stream(db, sql, params, batch_size, mapper, self._observe, _ms_since(started)):
+                yield batch
+
+    async def iterate(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        batch_size: int = 500,
+        mapper: Optional[RowMapper] = None,
+    ) -> AsyncIterator[Any]:
+        """Row-at-a-time view over iterate_batches()."""
+        async for batch in self.iterate_batches(sql, params, batch_size, mapper):
+            for row in batch:
+                yield row
+
+    def pool_stats(self) -> dict[str, PoolStats]:
+        return {"write": self._write_pool.stats(), "read": self._read_pool.stats()}
+
+    def writer_stats(self) -> WriterStats:
+        return self._writer.stats()
+
+    async def close(self) -> None:
+        await self._writer.close()
+        if self._plan_tasks:
+            await asyncio.gather(*self._plan_tasks, return_exceptions=True)
+        await self._read_pool.close()
+        await self._write_pool.close()
+        if self._keepalive is not None:
+            self._keepalive.close()
+            self._keepalive = None
+
+
+# what repositories accept: the shared Database or an open Transaction
+Executor = Union[Database, Transaction]
@@ -0,0 +1,119 @@
+# app/infra/db/maintenance.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from app.infra.db.connection import Database
+from app.infra.db.repo.scheduled_jobs_sqlite import ScheduledJob
+
+log = logging.getLogger(__name__)
+
+MAINTENANCE_JOB_TYPE = "db_maintenance"
+
+
+@dataclass(frozen=True)
+class MaintenanceConfig:
+    # WAL at or above this size is checkpointed with TRUNCATE (resets the
+    # -wal file to zero bytes); below it a PASSIVE checkpoint is enough
+    truncate_wal_bytes: int = 16 * 1024 * 1024
+    vacuum_pages_per_step: int = 256
+    max_vacuum_steps: int = 64
+    step_pause_s: float = 0.01
+
+
+@dataclass(frozen=True)
+class MaintenanceReport:
+    checkpoint_mode: str
+    checkpoint_busy: bool
+    db_bytes_before: int
+    db_bytes_after: int
+    wal_bytes_before: int
+    wal_bytes_after: int
+    freelist_before: int
+    freelist_after: int
+    vacuum_steps: int
+    elapsed_ms: float
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return (self.db_bytes_before + self.wal_bytes_before) - (self.db_bytes_after + self.wal_bytes_after)
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class MaintenanceService:
+    """
+    Keeps the database file and its WAL from growing without bound.
+
+    1. `PRAGMA incremental_vacuum(n)` in chunks of `vacuum_pages_per_step`
+       pages until the freelist is empty or `max_vacuum_steps` is reached
+       (needs auto_vacuum=INCREMENTAL, see migration 0003). Each chunk is
+       its own short write, so bot writes interleave between chunks.
+    2. One WAL checkpoint: TRUNCATE if the -wal file is large, else PASSIVE.
+       PASSIVE never waits for readers; TRUNCATE waits up to busy_timeout.
+    """
+
+    def __init__(self, db: Database, cfg: MaintenanceConfig = MaintenanceConfig()) -> None:
+        self._db = db
+        self._cfg = cfg
+        self._lock = asyncio.Lock()
+
+    async def run_job(self, job: ScheduledJob) -> None:
+        """JobRunner entry point for MAINTENANCE_JOB_TYPE."""
+        r = await self.run()
+        log.info(
+            "db maintenance: %s checkpoint%s, %d vacuum steps, freelist %d -> %d, "
+            "reclaimed %d bytes in %.0f ms",
+            r.checkpoint_mode, " (busy)" if r.checkpoint_busy else "", r.vacuum_steps,
+            r.freelist_before, r.freelist_after, r.reclaimed_bytes, r.elapsed_ms,
+        )
+
+    async def _freelist(self) -> int:
+        row = await self._db.fetchone("PRAGMA freelist_count;")
+        return int(row[0]) if row else 0
+
+    async def run(self) -> MaintenanceReport:
+        async with self._lock:
+            cfg = self._cfg
+            db_path = self._db.path
+            wal_path = db_path + "-wal"
+            started = time.perf_counter()
+
+            db_before, wal_before = _size(db_path), _size(wal_path)
+            free_before = free = await self._freelist()
+
+            steps = 0
+            while free > 0 and steps < cfg.max_vacuum_steps:
+                # executescript steps the pragma to completion; a plain
+                # execute() would free a single page
+                await self._db.executescript(f"PRAGMA incremental_vacuum({int(cfg.vacuum_pages_per_step)});")
+                steps += 1
+                free = await self._freelist()
+                if free > 0 and cfg.step_pause_s > 0:
+                    await asyncio.sleep(cfg.step_pause_s)
+
+            mode = "TRUNCATE" if _size(wal_path) >= cfg.truncate_wal_bytes else "PASSIVE"
+            row = await self._db.fetchone(f"PRAGMA wal_checkpoint({mode});")
+            busy = bool(row[0]) if row else False
+
+            return MaintenanceReport(
+                checkpoint_mode=mode,
+                checkpoint_busy=busy,
+                db_bytes_before=db_before,
+                db_bytes_after=_size(db_path),
+                wal_bytes_before=wal_before,
+                wal_bytes_after=_size(wal_path),
+                freelist_before=free_before,
+                freelist_after=free,
+                vacuum_steps=steps,
+                elapsed_ms=(time.perf_counter() - started) * 1000.0,
+            )
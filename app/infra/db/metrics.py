@@ -0,0 +1,130 @@
+# app/infra/db/metrics.py
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import re
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+log = logging.getLogger("app.db.slow")
+
+# upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0)
+
+_WS = re.compile(r"\s+")
+_STR = re.compile(r"'(?:[^']|'')*'")
+_NUM = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    Collapse whitespace and literals so one statement shape is one key.
+    Cached per raw string: repo SQL is module-level constants, so this runs
+    the regexes once per statement instead of on every execution.
+    """
+    s = _WS.sub(" ", sql).strip().rstrip(";").strip()
+    s = _STR.sub("?", s)
+    s = _NUM.sub("?", s)
+    return _IN_LIST.sub("(?, ...)", s)
+
+
+@dataclass
+class StatementStats:
+    sql: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    wait_ms: float = 0.0
+    rows: int = 0
+    errors: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def percentile_ms(self, q: float) -> float:
+        """Upper bound of the histogram bucket holding the q-quantile."""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    sql: str
+    elapsed_ms: float
+    wait_ms: float
+    rows: int
+    plan: tuple[str, ...]
+
+
+class QueryMetrics:
+    """
+    Per-statement latency histograms keyed by normalized SQL, plus a
+    bounded log of slow statements with their EXPLAIN QUERY PLAN output.
+    """
+
+    def __init__(self, slow_ms: float = 100.0, slow_log_size: int = 50) -> None:
+        self.slow_ms = slow_ms
+        self._stats: dict[str, StatementStats] = {}
+        self._slow: deque[SlowQuery] = deque(maxlen=slow_log_size)
+
+    def record(self, sql: str, elapsed_ms: float, wait_ms: float = 0.0, rows: int = 0, failed: bool = False) -> bool:
+        """Record one execution. Returns True if it crossed the slow threshold."""
+        key = normalize_sql(sql)
+        st = self._stats.get(key)
+        if st is None:
+            st = self._stats[key] = StatementStats(sql=key)
+        st.calls += 1
+        st.total_ms += elapsed_ms
+        st.max_ms = max(st.max_ms, elapsed_ms)
+        st.wait_ms += wait_ms
+        st.rows += max(rows, 0)
+        if failed:
+            st.errors += 1
+        st.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        return elapsed_ms >= self.slow_ms
+
+    def record_slow(self, sql: str, elapsed_ms: float, wait_ms: float, rows: int, plan: tuple[str, ...]) -> None:
+        entry = SlowQuery(normalize_sql(sql), elapsed_ms, wait_ms, rows, plan)
+        self._slow.append(entry)
+        log.warning(
+            "slow query %.1f ms (wait %.1f ms, %d rows): %s\n  plan: %s",
+            elapsed_ms, wait_ms, rows, entry.sql, " | ".join(plan) or "-",
+        )
+
+    def top(self, n: int = 10, key: str = "total_ms") -> list[StatementStats]:
+        return sorted(self._stats.values(), key=lambda s: getattr(s, key), reverse=True)[:n]
+
+    def slow_queries(self) -> list[SlowQuery]:
+        return list(self._slow)
+
+    def reset(self) -> None:
+        self._stats.clear()
+        self._slow.clear()
+
+    def dump(self, path: Path, n: Optional[int] = None) -> None:
+        stats = self.top(n or len(self._stats))
+        data = {
+            "slow_ms": self.slow_ms,
+            "statements": [
+                {**asdict(s), "avg_ms": s.avg_ms, "p95_ms": s.percentile_ms(0.95)} for s in stats
+            ],
+            "slow_queries": [asdict(q) for q in self._slow],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
@@ -0,0 +1,8 @@
+-- migrate: no-transaction
+-- Track free pages so the maintenance job can hand them back to the
+-- filesystem with PRAGMA incremental_vacuum(n).
+-- auto_vacuum only changes on an existing database through a full VACUUM,
+-- which cannot run inside a transaction: keep this file to these two statements.
+
+PRAGMA auto_vacuum = INCREMENTAL;
+VACUUM;
@@ -0,0 +1,14 @@
+-- Carry the ORDER BY columns in the indexes the repo queries search, so
+-- no statement sorts through a temp B-tree.
+-- Checked by: python -m app.tools.plancheck
+
+-- todo lists: WHERE user_id, status ORDER BY due_at, created_at
+DROP INDEX IF EXISTS idx_scheduled_user;
+CREATE INDEX IF NOT EXISTS idx_scheduled_user
+ON scheduled_jobs(user_id, status, due_at, created_at);
+
+-- get_open_entry: newest open entry without walking the closed history
+DROP INDEX IF EXISTS idx_worklog_open_entries;
+CREATE INDEX IF NOT EXISTS idx_worklog_open_entries
+ON worklog_entries(user_id, agent_id, start_at)
+WHERE end_at IS NULL;
@@ -0,0 +1,19 @@
+-- due_at is ISO text written with mixed offsets ('+00:00', 'Z', local),
+-- so comparing it as a string orders and filters wrongly. due_at_ms holds
+-- the same instant as UTC epoch milliseconds; the repo filters and sorts
+-- on it and keeps due_at for display.
+
+ALTER TABLE scheduled_jobs ADD COLUMN due_at_ms INTEGER;
+
+UPDATE scheduled_jobs
+SET due_at_ms = CAST(round((julianday(due_at) - 2440587.5) * 86400000) AS INTEGER);
+
+-- list_due: WHERE status = 'pending' AND due_at_ms <= ? ORDER BY due_at_ms
+DROP INDEX IF EXISTS idx_scheduled_due;
+CREATE INDEX IF NOT EXISTS idx_scheduled_due_ms
+ON scheduled_jobs(status, due_at_ms);
+
+-- todo lists: WHERE user_id, status ORDER BY due_at_ms, created_at
+DROP INDEX IF EXISTS idx_scheduled_user;
+CREATE INDEX IF NOT EXISTS idx_scheduled_user
+ON scheduled_jobs(user_id, status, due_at_ms, created_at);
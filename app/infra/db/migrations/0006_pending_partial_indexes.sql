@@ -0,0 +1,26 @@
+-- Done / cancelled / failed rows stay in scheduled_jobs forever, and
+-- untimed todos sat in the due range behind a 9999-12-31 due_at. Index
+-- only what the scheduler and the todo lists can return, so their cost
+-- follows pending work, not history.
+-- Checked by: python -m app.tools.plancheck
+
+-- untimed todos are 'manual': listed, never run by the scheduler
+UPDATE scheduled_jobs
+SET schedule_kind = 'manual'
+WHERE job_type = 'todo' AND schedule_kind = 'once' AND due_at_ms >= 253402300799000;
+
+-- list_due: WHERE status = 'pending' AND schedule_kind <> 'manual' AND due_at_ms <= ?
+DROP INDEX IF EXISTS idx_scheduled_due_ms;
+CREATE INDEX IF NOT EXISTS idx_scheduled_due_pending
+ON scheduled_jobs(due_at_ms)
+WHERE status = 'pending' AND schedule_kind <> 'manual';
+
+-- todo lists: WHERE user_id = ? AND status = 'pending' ORDER BY due_at_ms, created_at
+DROP INDEX IF EXISTS idx_scheduled_user;
+CREATE INDEX IF NOT EXISTS idx_scheduled_user_pending
+ON scheduled_jobs(user_id, due_at_ms, created_at)
+WHERE status = 'pending';
+
+-- user_id alone: ON DELETE CASCADE from users, and exports by user
+CREATE INDEX IF NOT EXISTS idx_scheduled_user_id
+ON scheduled_jobs(user_id);
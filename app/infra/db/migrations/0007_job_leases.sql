@@ -0,0 +1,11 @@
+-- Scheduler workers claim due jobs by flipping them to 'running' with a
+-- lease (owner + expiry, UTC epoch ms). A lease that expires without the
+-- job being finished is taken over by the next claim.
+
+ALTER TABLE scheduled_jobs ADD COLUMN lease_owner TEXT;
+ALTER TABLE scheduled_jobs ADD COLUMN lease_expires_ms INTEGER;
+
+-- claim_due: WHERE status = 'running' AND lease_expires_ms <= ?
+CREATE INDEX IF NOT EXISTS idx_scheduled_running_lease
+ON scheduled_jobs(lease_expires_ms)
+WHERE status = 'running';
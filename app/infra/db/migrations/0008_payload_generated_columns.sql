@@ -0,0 +1,11 @@
+-- Todo title and chat id live in payload_json. Expose them as generated
+-- columns so queries return them directly and nothing has to json.loads
+-- the payload to render a list. VIRTUAL: computed when read, no storage.
+-- Not indexed: no query filters or sorts on them (see plancheck); add an
+-- index here once one does.
+
+ALTER TABLE scheduled_jobs ADD COLUMN title TEXT
+  GENERATED ALWAYS AS (json_extract(payload_json, '$.title')) VIRTUAL;
+
+ALTER TABLE scheduled_jobs ADD COLUMN chat_id INTEGER
+  GENERATED ALWAYS AS (json_extract(payload_json, '$.chat_id')) VIRTUAL;
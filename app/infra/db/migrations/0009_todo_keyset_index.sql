@@ -0,0 +1,10 @@
+-- Todo list pages are keyed on (due_at_ms, created_at, job_id): untimed
+-- todos all share one due_at_ms, so job_id breaks the remaining ties.
+-- Carry it in the pending-by-user index so a page starts with one seek
+-- on the whole key and reads rows in index order, no sort.
+-- Checked by: python -m app.tools.plancheck
+
+DROP INDEX IF EXISTS idx_scheduled_user_pending;
+CREATE INDEX IF NOT EXISTS idx_scheduled_user_pending
+ON scheduled_jobs(user_id, due_at_ms, created_at, job_id)
+WHERE status = 'pending';
@@ -0,0 +1,226 @@
+# app/infra/db/pool.py
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Sequence
+
+from app.infra.db.worker import SqliteWorker
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    max_size: int
+    opened: int
+    idle: int
+    in_use: int
+    acquires: int
+    waits: int
+    wait_ms_total: float
+    wait_ms_max: float
+    hold_ms_total: float
+    hold_ms_max: float
+    health_check_failures: int
+    # coroutines waiting for a free connection
+    queue_depth: int
+    max_queue_depth: int
+    # work run on the connections' threads (see SqliteWorker)
+    thread_jobs: int
+    thread_busy_ms_total: float
+    # jobs queued on the connections' threads, now and the deepest any got
+    thread_queue_depth: int
+    thread_max_queue_depth: int
+
+    @property
+    def thread_busy_ms_avg(self) -> float:
+        return self.thread_busy_ms_total / self.thread_jobs if self.thread_jobs else 0.0
+
+    @property
+    def wait_ms_avg(self) -> float:
+        return self.wait_ms_total / self.acquires if self.acquires else 0.0
+
+    @property
+    def hold_ms_avg(self) -> float:
+        return self.hold_ms_total / self.acquires if self.acquires else 0.0
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived sqlite3 connections, each owned by its own
+    worker thread (SqliteWorker), so the pool is also a fixed-size executor:
+    at most `max_size` threads, started once, never per statement.
+
+    - connections are opened lazily, up to `max_size`
+    - PRAGMAs are applied once, when a connection is opened
+    - a connection that sat idle longer than `health_check_after` seconds, or
+      whose last use raised, is pinged and replaced if the ping fails
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int = 4,
+        pragmas: Sequence[str] = (),
+        health_check_after: float = 30.0,
+        uri: bool = False,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self._path = path
+        self._max_size = max_size
+        self._pragmas = tuple(pragmas)
+        self._health_check_after = health_check_after
+        self._uri = uri
+
+        self._slots = asyncio.Semaphore(max_size)
+        self._idle: list[tuple[SqliteWorker, float]] = []
+        self._live: set[SqliteWorker] = set()
+        self._held_since: dict[int, float] = {}
+        self._opened = 0
+        self._closed = False
+
+        self._acquires = 0
+        self._waits = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+        self._hold_ms_total = 0.0
+        self._hold_ms_max = 0.0
+        self._health_check_failures = 0
+        self._queued = 0
+        self._max_queued = 0
+        # totals of workers already discarded
+        self._retired_jobs = 0
+        self._retired_busy_ms = 0.0
+
+    async def _open(self) -> SqliteWorker:
+        conn = SqliteWorker(self._path, uri=self._uri)
+        try:
+            await conn.start(self._pragmas)
+        except Exception:
+            await conn.close()
+            raise
+        self._opened += 1
+        self._live.add(conn)
+        return conn
+
+    async def _discard(self, conn: SqliteWorker) -> None:
+        self._opened -= 1
+        self._live.discard(conn)
+        try:
+            await conn.close()
+        except Exception:
+            pass
+        ws = conn.stats()
+        self._retired_jobs += ws.jobs
+        self._retired_busy_ms += ws.busy_ms_total
+
+    async def _is_healthy(self, conn: SqliteWorker) -> bool:
+        try:
+            await conn.execute("SELECT 1;")
+            return True
+        except Exception:
+            self._health_check_failures += 1
+            return False
+
+    async def acquire(self) -> SqliteWorker:
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+
+        started = time.perf_counter()
+        if self._slots.locked():
+            self._waits += 1
+        self._queued += 1
+        self._max_queued = max(self._max_queued, self._queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        waited_ms = (time.perf_counter() - started) * 1000.0
+
+        self._acquires += 1
+        self._wait_ms_total += waited_ms
+        self._wait_ms_max = max(self._wait_ms_max, waited_ms)
+
+        try:
+            conn = await self._take()
+        except BaseException:
+            self._slots.release()
+            raise
+        self._held_since[id(conn)] = time.perf_counter()
+        return conn
+
+    async def _take(self) -> SqliteWorker:
+        while self._idle:
+            conn, idle_since = self._idle.pop()
+            if time.monotonic() - idle_since < self._health_check_after:
+                return conn
+            if await self._is_healthy(conn):
+                return conn
+            await self._discard(conn)
+        return await self._open()
+
+    async def release(self, conn: SqliteWorker, check: bool = False) -> None:
+        held_since = self._held_since.pop(id(conn), None)
+        if held_since is not None:
+            held_ms = (time.perf_counter() - held_since) * 1000.0
+            self._hold_ms_total += held_ms
+            self._hold_ms_max = max(self._hold_ms_max, held_ms)
+
+        broken = False
+        try:
+            if check and not await self._is_healthy(conn):
+                broken = True
+            if not broken and conn.in_transaction:
+                try:
+                    await conn.rollback()
+                except Exception:
+                    broken = True
+            if broken or self._closed:
+                await self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[SqliteWorker]:
+        conn = await self.acquire()
+        failed = False
+        try:
+            yield conn
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            await self.release(conn, check=failed)
+
+    async def close(self) -> None:
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await self._discard(conn)
+
+    def stats(self) -> PoolStats:
+        idle = len(self._idle)
+        live = [conn.stats() for conn in self._live]
+        return PoolStats(
+            max_size=self._max_size,
+            opened=self._opened,
+            idle=idle,
+            in_use=self._opened - idle,
+            acquires=self._acquires,
+            waits=self._waits,
+            wait_ms_total=self._wait_ms_total,
+            wait_ms_max=self._wait_ms_max,
+            hold_ms_total=self._hold_ms_total,
+            hold_ms_max=self._hold_ms_max,
+            health_check_failures=self._health_check_failures,
+            queue_depth=self._queued,
+            max_queue_depth=self._max_queued,
+            thread_jobs=self._retired_jobs + sum(ws.jobs for ws in live),
+            thread_busy_ms_total=self._retired_busy_ms + sum(ws.busy_ms_total for ws in live),
+            thread_queue_depth=sum(ws.queue_depth for ws in live),
+            thread_max_queue_depth=max((ws.max_queue_depth for ws in live), default=0),
+        )
@@ -0,0 +1,80 @@
+# app/infra/db/profiles.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """
+    Per-connection PRAGMAs trading durability for speed.
+
+    synchronous under WAL: FULL syncs the WAL on every commit; NORMAL only
+    at checkpoints (a power loss can drop the last commits, never corrupts);
+    OFF leaves syncing to the OS entirely.
+    """
+    name: str
+    synchronous: str
+    cache_size_kib: int
+    mmap_size: int
+    temp_store: str
+    wal_autocheckpoint: int
+    busy_timeout_ms: int
+
+    def _common(self) -> tuple[str, ...]:
+        return (
+            f"PRAGMA busy_timeout={self.busy_timeout_ms};",
+            "PRAGMA foreign_keys=ON;",
+            f"PRAGMA cache_size=-{self.cache_size_kib};",
+            f"PRAGMA mmap_size={self.mmap_size};",
+            f"PRAGMA temp_store={self.temp_store};",
+        )
+
+    def write_pragmas(self) -> tuple[str, ...]:
+        return self._common() + (
+            "PRAGMA journal_mode=WAL;",
+            f"PRAGMA synchronous={self.synchronous};",
+            f"PRAGMA wal_autocheckpoint={self.wal_autocheckpoint};",
+        )
+
+    def read_pragmas(self) -> tuple[str, ...]:
+        return self._common() + ("PRAGMA query_only=ON;",)
+
+
+# busy_timeout stays short in all of them: longer waits go through RetryPolicy backoff
+DURABLE = StorageProfile(
+    name="durable",
+    synchronous="FULL",
+    cache_size_kib=8 * 1024,
+    mmap_size=0,
+    temp_store="DEFAULT",
+    wal_autocheckpoint=1000,
+    busy_timeout_ms=1000,
+)
+BALANCED = StorageProfile(
+    name="balanced",
+    synchronous="NORMAL",
+    cache_size_kib=16 * 1024,
+    mmap_size=64 * 1024 * 1024,
+    temp_store="MEMORY",
+    wal_autocheckpoint=1000,
+    busy_timeout_ms=1000,
+)
+THROUGHPUT = StorageProfile(
+    name="throughput",
+    synchronous="OFF",
+    cache_size_kib=64 * 1024,
+    mmap_size=256 * 1024 * 1024,
+    temp_store="MEMORY",
+    wal_autocheckpoint=4000,
+    busy_timeout_ms=500,
+)
+
+PROFILES: dict[str, StorageProfile] = {p.name: p for p in (DURABLE, BALANCED, THROUGHPUT)}
+
+
+def get_profile(name: str) -> StorageProfile:
+    try:
+        return PROFILES[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"unknown storage profile {name!r}; expected one of {', '.join(PROFILES)}") from None
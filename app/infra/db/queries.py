@@ -0,0 +1,34 @@
+# app/infra/db/queries.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RegisteredQuery:
+    name: str
+    sql: str
+    # plan rules this statement is allowed to break on purpose
+    allow_scan: bool = False
+    allow_temp_btree: bool = False
+
+
+_REGISTRY: dict[str, RegisteredQuery] = {}
+
+
+def query(name: str, sql: str, allow_scan: bool = False, allow_temp_btree: bool = False) -> str:
+    """
+    Register a repository statement for the query-plan check
+    (python -m app.tools.plancheck) and return it unchanged.
+
+    Define repo SQL at module level through this, so importing the repo
+    module registers every statement it can run.
+    """
+    if name in _REGISTRY and _REGISTRY[name].sql != sql:
+        raise ValueError(f"query {name!r} registered twice with different SQL")
+    _REGISTRY[name] = RegisteredQuery(name, sql, allow_scan, allow_temp_btree)
+    return sql
+
+
+def registered() -> list[RegisteredQuery]:
+    return sorted(_REGISTRY.values(), key=lambda q: q.name)
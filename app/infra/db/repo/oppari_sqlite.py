@@ -1,49 +1,137 @@
 from __future__ import annotations
 
 import json
-from typing import Optional, Sequence, Dict, Any
+import sqlite3
+from typing import AsyncIterator, Optional, Sequence, Dict, Any
 
 from app.domain.common.time import from_iso
 from app.domain.oppari.models import WorklogEntry
 from app.domain.oppari.ports import WorklogRepository
-from app.infra.db.connection import Database
+from app.infra.db.connection import Executor
+from app.infra.db.queries import query
+from app.infra.db.rows import select_list
+from app.infra.db.users import UserDirectory
+
+
+_ENTRY_COLUMNS = (
+    "entry_id", "user_id", "agent_id",
+    "start_at", "end_at", "break_minutes", "description",
+    "metadata_json", "created_at", "updated_at",
+)
+_ENTRY_SELECT = select_list(_ENTRY_COLUMNS)
+
+
+def _entry_mapper(cursor: sqlite3.Cursor, row: tuple) -> WorklogEntry:
+    """
+    Row factory for _ENTRY_COLUMNS. Decodes eagerly into a plain
+    WorklogEntry: the service reads start_at and metadata of every entry,
+    and worklog queries return a handful of rows.
+    """
+    return WorklogEntry(
+        row[0],
+        row[1],
+        row[2],
+        from_iso(row[3]),
+        from_iso(row[4]) if row[4] else None,
+        row[5] or 0,
+        row[6],
+        json.loads(row[7]) if row[7] else {},
+        from_iso(row[8]),
+        from_iso(row[9]),
+    )
+
+
+_SQL_USER_EXISTS = query("oppari.ensure_user.select", "SELECT user_id FROM users WHERE user_id = ?;")
+_SQL_TOUCH_USER = query("oppari.ensure_user.touch", "UPDATE users SET last_seen_at = ? WHERE user_id = ?;")
+_SQL_INSERT_USER = query("oppari.ensure_user.insert", "INSERT INTO users(user_id, created_at, last_seen_at) VALUES (?, ?, ?);")
+_SQL_AGENT_EXISTS = query("oppari.ensure_agent.select", "SELECT agent_id FROM agents WHERE agent_id = ?;")
+_SQL_INSERT_AGENT = query("oppari.ensure_agent.insert", "INSERT INTO agents(agent_id, name, category, is_active, created_at) VALUES (?, ?, ?, 1, ?);")
+
+_SQL_OPEN_ENTRY = query("oppari.get_open_entry", f"""
+    SELECT {_ENTRY_SELECT}
+    FROM worklog_entries
+    WHERE user_id = ? AND agent_id = ? AND end_at IS NULL
+    ORDER BY start_at DESC
+    LIMIT 1;
+""")
+
+_SQL_START_ENTRY = query("oppari.start_entry", """
+    INSERT INTO worklog_entries(
+      entry_id, user_id, agent_id, project, category,
+      start_at, end_at, break_minutes, description,
+      metadata_json, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, NULL, 0, ?, ?, ?, ?);
+""")
+
+_SQL_END_ENTRY = query("oppari.end_entry", """
+    UPDATE worklog_entries
+    SET end_at = ?,
+        break_minutes = ?,
+        description = ?,
+        metadata_json = ?,
+        updated_at = ?
+    WHERE entry_id = ?;
+""")
+
+_SQL_LIST_RECENT = query("oppari.list_recent", f"""
+    SELECT {_ENTRY_SELECT}
+    FROM worklog_entries
+    WHERE user_id = ? AND agent_id = ?
+    ORDER BY start_at DESC
+    LIMIT ?;
+""")
+
+_SQL_ITER_ENTRIES = query("oppari.iter_entries", f"""
+    SELECT {_ENTRY_SELECT}
+    FROM worklog_entries
+    WHERE user_id = ? AND agent_id = ?
+    ORDER BY start_at ASC;
+""")
 
 
 class OppariSqliteRepo(WorklogRepository):
-    def __init__(self, db: Database) -> None:
+    """
+    With a UserDirectory, ensure_user / ensure_agent_registered go through
+    it (known-users cache + buffered last_seen_at) instead of hitting the
+    database on every call.
+    """
+
+    def __init__(self, db: Executor, users: Optional[UserDirectory] = None) -> None:
         self._db = db
+        self._users = users
 
     async def ensure_user(self, user_id: int, now_iso: str) -> None:
-        row = await self._db.fetchone("SELECT user_id FROM users WHERE user_id = ?;", (user_id,))
-        if row:
-            await self._db.execute("UPDATE users SET last_seen_at = ? WHERE user_id = ?;", (now_iso, user_id))
+        if self._users is not None:
+            await self._users.ensure_user(user_id, now_iso)
             return
-        await self._db.execute(
-            "INSERT INTO users(user_id, created_at, last_seen_at) VALUES (?, ?, ?);",
-            (user_id, now_iso, now_iso),
-        )
+        async with self._db.transaction() as tx:
+            row = await tx.fetchone(_SQL_USER_EXISTS, (user_id,))
+            if row:
+                await tx.execute(_SQL_TOUCH_USER, (now_iso, user_id))
+                return
+            await tx.execute(
+                _SQL_INSERT_USER,
+                (user_id, now_iso, now_iso),
+            )
 
     async def ensure_agent_registered(self, agent_id: str, name: str, category: str, now_iso: str) -> None:
-        row = await self._db.fetchone("SELECT agent_id FROM agents WHERE agent_id = ?;", (agent_id,))
+        if self._users is not None:
+            await self._users.ensure_agent(agent_id, name, category, now_iso)
+            return
+        row = await self._db.fetchone(_SQL_AGENT_EXISTS, (agent_id,))
         if row:
             return
         await self._db.execute(
-            "INSERT INTO agents(agent_id, name, category, is_active, created_at) VALUES (?, ?, ?, 1, ?);",
+            _SQL_INSERT_AGENT,
             (agent_id, name, category, now_iso),
         )
 
     async def get_open_entry(self, user_id: int, agent_id: str) -> Optional[WorklogEntry]:
-        row = await self._db.fetchone(
-            """
-            SELECT *
-            FROM worklog_entries
-            WHERE user_id = ? AND agent_id = ? AND end_at IS NULL
-            ORDER BY start_at DESC
-            LIMIT 1;
-            """,
+        return await self._db.fetchone(
+            _SQL_OPEN_ENTRY,
             (user_id, agent_id),
+            mapper=_entry_mapper,
         )
-        return self._row_to_entry(row) if row else None
 
     async def start_entry(
         self,
@@ -59,13 +147,7 @@ class OppariSqliteRepo(WorklogRepository):
     ) -> None:
         meta_json = json.dumps(metadata, ensure_ascii=False) if metadata else None
         await self._db.execute(
-            """
-            INSERT INTO worklog_entries(
-              entry_id, user_id, agent_id, project, category,
-              start_at, end_at, break_minutes, description,
-              metadata_json, created_at, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, NULL, 0, ?, ?, ?, ?);
-            """,
+            _SQL_START_ENTRY,
             (entry_id, user_id, agent_id, project, category, start_at_iso, description, meta_json, created_at_iso, created_at_iso),
         )
 
@@ -80,43 +162,23 @@ class OppariSqliteRepo(WorklogRepository):
     ) -> None:
         meta_json = json.dumps(metadata, ensure_ascii=False) if metadata else None
         await self._db.execute(
-            """
-            UPDATE worklog_entries
-            SET end_at = ?,
-                break_minutes = ?,
-                description = ?,
-                metadata_json = ?,
-                updated_at = ?
-            WHERE entry_id = ?;
-            """,
+            _SQL_END_ENTRY,
             (end_at_iso, break_minutes, description, meta_json, updated_at_iso, entry_id),
         )
 
     async def list_recent(self, user_id: int, agent_id: str, limit: int) -> Sequence[WorklogEntry]:
-        rows = await self._db.fetchall(
-            """
-            SELECT *
-            FROM worklog_entries
-            WHERE user_id = ? AND agent_id = ?
-            ORDER BY start_at DESC
-            LIMIT ?;
-            """,
+        return await self._db.fetchall(
+            _SQL_LIST_RECENT,
             (user_id, agent_id, limit),
+            mapper=_entry_mapper,
         )
-        return [self._row_to_entry(r) for r in rows]
-
-    def _row_to_entry(self, row) -> WorklogEntry:
-        meta_raw = row["metadata_json"]
-        metadata = json.loads(meta_raw) if meta_raw else {}
-        return WorklogEntry(
-            entry_id=row["entry_id"],
-            user_id=row["user_id"],
-            agent_id=row["agent_id"],
-            start_at=from_iso(row["start_at"]),
-            end_at=from_iso(row["end_at"]) if row["end_at"] else None,
-            break_minutes=int(row["break_minutes"] or 0),
-            description=row["description"],
-            metadata=metadata,
-            created_at=from_iso(row["created_at"]),
-            updated_at=from_iso(row["updated_at"]),
-        )
+
+    async def iter_entries(self, user_id: int, agent_id: str, batch_size: int = 500) -> AsyncIterator[WorklogEntry]:
+        """Stream all entries oldest first with bounded memory (exports, stats)."""
+        async for entry in self._db.iterate(
+            _SQL_ITER_ENTRIES,
+            (user_id, agent_id),
+            batch_size=batch_size,
+            mapper=_entry_mapper,
+        ):
+            yield entry
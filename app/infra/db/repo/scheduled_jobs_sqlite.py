@@ -2,33 +2,383 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
-from typing import Any, Optional, Sequence
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, AsyncIterator, Optional, Sequence
 
-from app.infra.db.connection import Database
+from app.domain.common.errors import ValidationError
+from app.domain.common.time import iso_to_epoch_ms
+from app.infra.db.connection import Executor
+from app.infra.db.queries import query
+from app.infra.db.rows import compile_mapper, select_list
 
 
 @dataclass(frozen=True)
 class ScheduledJob:
+    """
+    Field order mirrors JOB_COLUMNS: rows map positionally.
+    `schedule` / `payload` are decoded from JSON on first access.
+    `due_at` is the ISO text as written; compare / sort on `due_at_ms`
+    (UTC epoch milliseconds). `title` / `chat_id` come from generated
+    columns over payload_json, so reading them decodes nothing.
+    """
     job_id: str
     user_id: int
     agent_id: str
     job_type: str
     schedule_kind: str
-    schedule: dict[str, Any]
-    payload: dict[str, Any]
+    schedule_json: Optional[str]
+    payload_json: Optional[str]
     status: str
     due_at: str
+    due_at_ms: int
     created_at: str
     updated_at: str
     run_count: int
     last_run_at: Optional[str]
     last_error: Optional[str]
     completed_at: Optional[str]
+    title: Optional[str]
+    chat_id: Optional[int]
+
+    @cached_property
+    def schedule(self) -> dict[str, Any]:
+        return json.loads(self.schedule_json) if self.schedule_json else {}
+
+    @cached_property
+    def payload(self) -> dict[str, Any]:
+        return json.loads(self.payload_json) if self.payload_json else {}
+
+
+@dataclass(frozen=True)
+class RunOutcome:
+    """
+    Result of running one claimed job, for record_outcomes().
+    `error` set => failed; else `next_due_at_iso_utc` None => done,
+    otherwise rescheduled. `worker_id` is the lease owner that ran it.
+    """
+    job_id: str
+    user_id: int
+    worker_id: str
+    finished_at_iso: str
+    next_due_at_iso_utc: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class TodoPage:
+    """
+    One page of a user's pending todos. `next_token` is None on the last
+    page; otherwise pass it back to list_todo_page() for the next one.
+    Tokens are a job_id, short enough for Telegram callback data.
+    """
+    jobs: list[ScheduledJob]
+    next_token: Optional[str]
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """
+    One job for create_many(); the same fields create() takes. Manual jobs
+    (untimed todos) have `due_at_iso_utc=None`, every other kind needs one.
+    """
+    job_id: str
+    user_id: int
+    agent_id: str
+    job_type: str
+    schedule_kind: str
+    due_at_iso_utc: Optional[str]
+    schedule: dict[str, Any] = field(default_factory=dict)
+    payload: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class CreateManyResult:
+    """
+    `created`: job_ids inserted, in input order. `conflicts`: job_ids left
+    alone because the id was already taken, in the table or earlier in
+    the same batch.
+    """
+    created: list[str]
+    conflicts: list[str]
+
+
+JOB_COLUMNS = (
+    "job_id", "user_id", "agent_id",
+    "job_type", "schedule_kind", "schedule_json", "payload_json",
+    "status", "due_at", "due_at_ms", "created_at", "updated_at",
+    "run_count", "last_run_at", "last_error", "completed_at",
+    "title", "chat_id",
+)
+_JOB_SELECT = select_list(JOB_COLUMNS)
+_job_mapper = compile_mapper(ScheduledJob, JOB_COLUMNS)
+
+_SQL_CREATE = query("jobs.create", """
+    INSERT INTO scheduled_jobs(
+      job_id, user_id, agent_id,
+      job_type, schedule_kind, schedule_json, payload_json,
+      status, due_at, due_at_ms, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?, ?);
+""")
+
+_SQL_EXISTING_JOB_IDS = query("jobs.existing_ids", """
+    SELECT job_id FROM scheduled_jobs
+    WHERE job_id IN (SELECT value FROM json_each(?));
+""")
+
+_SQL_ENSURE_RECURRING = query("jobs.ensure_recurring", """
+    INSERT INTO scheduled_jobs(
+      job_id, user_id, agent_id,
+      job_type, schedule_kind, schedule_json, payload_json,
+      status, due_at, due_at_ms, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, 'interval', ?, NULL, 'pending', ?, ?, ?, ?)
+    ON CONFLICT(job_id) DO UPDATE SET
+      schedule_json=excluded.schedule_json,
+      due_at=CASE WHEN scheduled_jobs.status IN ('pending', 'running')
+                  THEN scheduled_jobs.due_at ELSE excluded.due_at END,
+      due_at_ms=CASE WHEN scheduled_jobs.status IN ('pending', 'running')
+                     THEN scheduled_jobs.due_at_ms ELSE excluded.due_at_ms END,
+      status=CASE WHEN scheduled_jobs.status='running' THEN 'running' ELSE 'pending' END,
+      completed_at=NULL,
+      updated_at=excluded.updated_at;
+""")
+
+_SQL_LIST_PENDING_TODOS = query("jobs.list_pending_todos_for_user", f"""
+    SELECT {_JOB_SELECT}
+    FROM scheduled_jobs
+    WHERE user_id=? AND status='pending' AND job_type='todo'
+    ORDER BY due_at_ms ASC, created_at ASC
+    LIMIT ?;
+""")
+
+# Keyset pages: the token is the last job_id of the previous page. Its key
+# is read first and bound as literals, SQLite only seeks on the whole row
+# value (due_at_ms, created_at, job_id) when the right-hand side is
+# constant; with a subquery or a join it seeks on due_at_ms alone and
+# filters every tie, and untimed todos all tie.
+
+_SQL_TODO_PAGE_KEY = query("jobs.todo_page_key", """
+    SELECT due_at_ms, created_at, job_id
+    FROM scheduled_jobs
+    WHERE job_id=? AND user_id=?;
+""")
+
+_SQL_TODO_PAGE_FIRST = query("jobs.todo_page_first", f"""
+    SELECT {_JOB_SELECT}
+    FROM scheduled_jobs
+    WHERE user_id=? AND status='pending' AND job_type='todo'
+    ORDER BY due_at_ms ASC, created_at ASC, job_id ASC
+    LIMIT ?;
+""")
+
+_SQL_TODO_PAGE_AFTER = query("jobs.todo_page_after", f"""
+    SELECT {_JOB_SELECT}
+    FROM scheduled_jobs
+    WHERE user_id=? AND status='pending' AND job_type='todo'
+      AND (due_at_ms, created_at, job_id) > (?, ?, ?)
+    ORDER BY due_at_ms ASC, created_at ASC, job_id ASC
+    LIMIT ?;
+""")
+
+# Todo mutations are single statements: the WHERE clause does the check
+# the old SELECT did, RETURNING says whether (or how many) rows matched.
+
+_SQL_CANCEL_TOP_TODO = query("jobs.cancel_top_todo", """
+    UPDATE scheduled_jobs
+    SET status='cancelled',
+        updated_at=?
+    WHERE job_id = (
+      SELECT job_id
+      FROM scheduled_jobs
+      WHERE user_id=? AND status='pending' AND job_type='todo'
+      ORDER BY due_at_ms ASC, created_at ASC
+      LIMIT 1
+    )
+    RETURNING job_id;
+""")
+
+_SQL_CANCEL_USER_JOB = query("jobs.cancel_for_user", """
+    UPDATE scheduled_jobs
+    SET status='cancelled',
+        updated_at=?
+    WHERE job_id=? AND user_id=? AND status='pending'
+    RETURNING job_id;
+""")
+
+_SQL_CANCEL_ALL_TODOS = query("jobs.cancel_all_todos", """
+    UPDATE scheduled_jobs
+    SET status='cancelled',
+        updated_at=?
+    WHERE user_id=? AND status='pending' AND job_type='todo'
+    RETURNING job_id;
+""")
+
+_SQL_MARK_DONE_FOR_USER = query("jobs.mark_done_for_user", """
+    UPDATE scheduled_jobs
+    SET status='done',
+        completed_at=?,
+        updated_at=?
+    WHERE job_id=? AND user_id=? AND status='pending'
+    RETURNING job_id;
+""")
+
+_SQL_UPDATE_TODO_TITLE = query("jobs.update_todo_title", """
+    UPDATE scheduled_jobs
+    SET payload_json=json_set(COALESCE(payload_json, '{}'), '$.title', ?),
+        updated_at=?
+    WHERE job_id=? AND user_id=? AND status='pending' AND job_type='todo'
+    RETURNING job_id;
+""")
+
+# untimed todos: listed in due order (last), never picked up by list_due
+MANUAL_SCHEDULE_KIND = "manual"
+# what the scheduler knows how to run (see SchedulerLoop._compute_next_due), plus manual
+SCHEDULE_KINDS = ("once", "interval", MANUAL_SCHEDULE_KIND)
+UNTIMED_DUE_AT = "9999-12-31T23:59:59+00:00"
+
+# the literal terms match idx_scheduled_due_pending's WHERE clause
+_SQL_LIST_DUE = query("jobs.list_due", f"""
+    SELECT {_JOB_SELECT}
+    FROM scheduled_jobs
+    WHERE status = 'pending' AND schedule_kind <> 'manual' AND due_at_ms <= ?
+    ORDER BY due_at_ms ASC
+    LIMIT ?;
+""")
+
+# Flip up to `limit` jobs to 'running' under a lease and return them:
+# expired leases first (their worker died mid-run), then due pending jobs.
+# One statement, so two workers can never claim the same row.
+_SQL_CLAIM_DUE = query("jobs.claim_due", f"""
+    UPDATE scheduled_jobs
+    SET status='running',
+        lease_owner=?,
+        lease_expires_ms=?,
+        updated_at=?
+    WHERE job_id IN (
+      SELECT job_id FROM (
+        SELECT job_id FROM scheduled_jobs
+        WHERE status = 'running' AND lease_expires_ms <= ?
+        ORDER BY lease_expires_ms
+        LIMIT ?
+      )
+      UNION ALL
+      SELECT job_id FROM (
+        SELECT job_id FROM scheduled_jobs
+        WHERE status = 'pending' AND schedule_kind <> 'manual' AND due_at_ms <= ?
+        ORDER BY due_at_ms
+        LIMIT ?
+      )
+      LIMIT ?
+    )
+    RETURNING {_JOB_SELECT};
+""")
+
+# Completion writes only land while the writer still holds the lease: once
+# it expires and claim_due() hands the job to another worker, a late result
+# from the old one must not overwrite the new run's status / lease.
+
+_SQL_RUN_OK_COMPLETE = query("jobs.mark_run_ok.complete", """
+    UPDATE scheduled_jobs
+    SET status='done',
+        completed_at=?,
+        last_run_at=?,
+        run_count=run_count+1,
+        last_error=NULL,
+        lease_owner=NULL,
+        lease_expires_ms=NULL,
+        updated_at=?
+    WHERE job_id=? AND status='running' AND lease_owner=?;
+""")
+
+_SQL_RUN_OK_RESCHEDULE = query("jobs.mark_run_ok.reschedule", """
+    UPDATE scheduled_jobs
+    SET status='pending',
+        due_at=?,
+        due_at_ms=?,
+        last_run_at=?,
+        run_count=run_count+1,
+        last_error=NULL,
+        lease_owner=NULL,
+        lease_expires_ms=NULL,
+        updated_at=?
+    WHERE job_id=? AND status='running' AND lease_owner=?;
+""")
+
+_SQL_RUN_FAILED = query("jobs.mark_run_failed", """
+    UPDATE scheduled_jobs
+    SET status='failed',
+        last_run_at=?,
+        run_count=run_count+1,
+        last_error=?,
+        lease_owner=NULL,
+        lease_expires_ms=NULL,
+        updated_at=?
+    WHERE job_id=? AND status='running' AND lease_owner=?;
+""")
+
+
+def _returning_job_id(sql: str) -> str:
+    # executemany() doesn't report changes for statements that return rows,
+    # so record_outcomes() runs the plain forms and mark_run_*() these
+    return sql.rstrip().removesuffix(";") + "\n    RETURNING job_id;\n"
+
+
+_SQL_RUN_OK_COMPLETE_RET = query("jobs.mark_run_ok.complete.returning", _returning_job_id(_SQL_RUN_OK_COMPLETE))
+_SQL_RUN_OK_RESCHEDULE_RET = query(
+    "jobs.mark_run_ok.reschedule.returning", _returning_job_id(_SQL_RUN_OK_RESCHEDULE)
+)
+_SQL_RUN_FAILED_RET = query("jobs.mark_run_failed.returning", _returning_job_id(_SQL_RUN_FAILED))
+
+_SQL_LEASE_OWNERS = query("jobs.lease_owners", """
+    SELECT job_id, lease_owner FROM scheduled_jobs
+    WHERE job_id IN (SELECT value FROM json_each(?)) AND status='running';
+""")
+
+_SQL_RELEASE_CLAIM = query("jobs.release_claim", """
+    UPDATE scheduled_jobs
+    SET status='pending',
+        lease_owner=NULL,
+        lease_expires_ms=NULL,
+        updated_at=?
+    WHERE job_id=? AND status='running' AND lease_owner=?;
+""")
+
+_SQL_CANCEL = query("jobs.cancel", """
+    UPDATE scheduled_jobs
+    SET status='cancelled',
+        updated_at=?
+    WHERE job_id=?;
+""")
+
+_SQL_LIST_PENDING_FOR_USER = query("jobs.list_pending_for_user", f"""
+    SELECT {_JOB_SELECT}
+    FROM scheduled_jobs
+    WHERE user_id=? AND status='pending'
+    ORDER BY due_at_ms ASC
+    LIMIT ?;
+""")
+
+_SQL_GET = query("jobs.get", f"SELECT {_JOB_SELECT} FROM scheduled_jobs WHERE job_id = ?;")
+
+
+def _iter_jobs_sql(by_user: bool, by_status: bool) -> str:
+    where = [c for c, on in (("user_id = ?", by_user), ("status = ?", by_status)) if on]
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    return query(
+        f"jobs.iter_jobs(user={by_user}, status={by_status})",
+        f"SELECT {_JOB_SELECT} FROM scheduled_jobs {where_sql} ORDER BY job_id;",
+        # exports walk the whole table (or a user's slice) in job_id order by design
+        allow_scan=True,
+        allow_temp_btree=True,
+    )
+
+
+# one statement per filter combination of iter_jobs()
+_SQL_ITER_JOBS = {(u, st): _iter_jobs_sql(u, st) for u in (False, True) for st in (False, True)}
 
 
 class ScheduledJobsRepo:
-    def __init__(self, db: Database) -> None:
+    def __init__(self, db: Executor) -> None:
         self._db = db
 
     async def create(
@@ -44,13 +394,7 @@ class ScheduledJobsRepo:
         now_iso: str,
     ) -> None:
         await self._db.execute(
-            """
-            INSERT INTO scheduled_jobs(
-              job_id, user_id, agent_id,
-              job_type, schedule_kind, schedule_json, payload_json,
-              status, due_at, created_at, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?);
-            """,
+            _SQL_CREATE,
             (
                 job_id,
                 user_id,
@@ -60,6 +404,65 @@ class ScheduledJobsRepo:
                 json.dumps(schedule, ensure_ascii=False) if schedule else None,
                 json.dumps(payload, ensure_ascii=False) if payload else None,
                 due_at_iso_utc,
+                iso_to_epoch_ms(due_at_iso_utc),
+                now_iso,
+                now_iso,
+            ),
+        )
+
+    async def create_many(self, specs: Sequence[JobSpec], now_iso: str) -> CreateManyResult:
+        """
+        Insert many jobs with one executemany in one transaction.
+
+        Every spec is validated and serialized first; if any is invalid,
+        ValidationError lists them all and nothing is written. A job_id
+        that already exists (or repeats within `specs`) is not an error:
+        it is skipped and reported in `conflicts`.
+        """
+        rows = job_spec_rows(specs, now_iso)
+        if not rows:
+            return CreateManyResult([], [])
+
+        async with self._db.transaction() as tx:
+            ids = json.dumps([r[0] for r in rows])
+            taken = {r[0] for r in await tx.fetchall(_SQL_EXISTING_JOB_IDS, (ids,))}
+            fresh, conflicts = [], []
+            for row in rows:
+                if row[0] in taken:
+                    conflicts.append(row[0])
+                else:
+                    taken.add(row[0])
+                    fresh.append(row)
+            if fresh:
+                await tx.executemany(_SQL_CREATE, fresh)
+        return CreateManyResult([r[0] for r in fresh], conflicts)
+
+    async def ensure_recurring(
+        self,
+        job_id: str,
+        user_id: int,
+        agent_id: str,
+        job_type: str,
+        minutes: int,
+        first_due_iso_utc: str,
+        now_iso: str,
+    ) -> None:
+        """
+        Idempotently keep one interval job alive under a fixed job_id
+        (maintenance jobs registered at startup). An existing pending or
+        running (claimed) job keeps its due_at and lease; a failed /
+        cancelled one is re-armed.
+        """
+        await self._db.execute(
+            _SQL_ENSURE_RECURRING,
+            (
+                job_id,
+                user_id,
+                agent_id,
+                job_type,
+                json.dumps({"minutes": minutes}),
+                first_due_iso_utc,
+                iso_to_epoch_ms(first_due_iso_utc),
                 now_iso,
                 now_iso,
             ),
@@ -76,235 +479,271 @@ class ScheduledJobsRepo:
         agent_id: str,
         title: str,
         chat_id: int,
-        due_at_iso_utc: str,
+        due_at_iso_utc: Optional[str],
         now_iso: str,
     ) -> None:
+        """`due_at_iso_utc=None` makes an untimed (manual) todo, listed after the timed ones."""
         payload = {"title": title, "chat_id": chat_id}
         await self.create(
             job_id=job_id,
             user_id=user_id,
             agent_id=agent_id,
             job_type="todo",
-            schedule_kind="once",
+            schedule_kind="once" if due_at_iso_utc is not None else MANUAL_SCHEDULE_KIND,
             schedule={},
             payload=payload,
-            due_at_iso_utc=due_at_iso_utc,
+            due_at_iso_utc=due_at_iso_utc if due_at_iso_utc is not None else UNTIMED_DUE_AT,
             now_iso=now_iso,
         )
 
-    async def list_pending_todos_for_user(self, user_id: int, limit: int = 5000):
-        rows = await self._db.fetchall(
-            """
-            SELECT *
-            FROM scheduled_jobs
-            WHERE user_id=? AND status='pending' AND job_type='todo'
-            ORDER BY due_at ASC, created_at ASC
-            LIMIT ?;
-            """,
+    async def list_pending_todos_for_user(self, user_id: int, limit: int = 5000) -> list[ScheduledJob]:
+        return await self._db.fetchall(
+            _SQL_LIST_PENDING_TODOS,
             (user_id, limit),
+            mapper=_job_mapper,
         )
-        return [self._row_to_job(r) for r in rows]
 
-    async def cancel_top_todo_for_user(self, user_id: int, now_iso: str) -> bool:
-        row = await self._db.fetchone(
-            """
-            SELECT job_id
-            FROM scheduled_jobs
-            WHERE user_id=? AND status='pending' AND job_type='todo'
-            ORDER BY due_at ASC, created_at ASC
-            LIMIT 1;
-            """,
-            (user_id,),
-        )
-        if not row:
-            return False
+    async def list_todo_page(
+        self, user_id: int, page_size: int = 8, after_token: Optional[str] = None
+    ) -> TodoPage:
+        """
+        Pending todos in list order, `page_size` at a time. Every page is an
+        index seek plus `page_size` rows, however deep it is. A token whose
+        job no longer exists (or isn't this user's) restarts from the top.
+        """
+        key = None
+        if after_token:
+            key = await self._db.fetchone(_SQL_TODO_PAGE_KEY, (after_token, user_id))
+        if key is None:
+            sql, params = _SQL_TODO_PAGE_FIRST, (user_id, page_size + 1)
+        else:
+            sql, params = _SQL_TODO_PAGE_AFTER, (user_id, *key, page_size + 1)
+        jobs = await self._db.fetchall(sql, params, mapper=_job_mapper)
+        if len(jobs) <= page_size:
+            return TodoPage(jobs, None)
+        jobs = jobs[:page_size]
+        return TodoPage(jobs, jobs[-1].job_id)
 
-        job_id = row["job_id"]
-        await self._db.execute(
-            """
-            UPDATE scheduled_jobs
-            SET status='cancelled',
-                updated_at=?
-            WHERE job_id=? AND user_id=?;
-            """,
-            (now_iso, job_id, user_id),
-        )
-        return True
+    async def cancel_top_todo_for_user(self, user_id: int, now_iso: str) -> bool:
+        rows = await self._db.execute_returning(_SQL_CANCEL_TOP_TODO, (now_iso, user_id))
+        return bool(rows)
 
     async def cancel_all_todos_for_user(self, user_id: int, now_iso: str) -> int:
-        row = await self._db.fetchone(
-            """
-            SELECT COUNT(*) AS cnt
-            FROM scheduled_jobs
-            WHERE user_id=? AND status='pending' AND job_type='todo';
-            """,
-            (user_id,),
-        )
-        cnt = int(row["cnt"]) if row else 0
-
-        await self._db.execute(
-            """
-            UPDATE scheduled_jobs
-            SET status='cancelled',
-                updated_at=?
-            WHERE user_id=? AND status='pending' AND job_type='todo';
-            """,
-            (now_iso, user_id),
-        )
-        return cnt
+        rows = await self._db.execute_returning(_SQL_CANCEL_ALL_TODOS, (now_iso, user_id))
+        return len(rows)
 
     async def mark_done_for_user(self, job_id: str, user_id: int, now_iso: str) -> bool:
-        row = await self._db.fetchone(
-            """
-            SELECT job_id
-            FROM scheduled_jobs
-            WHERE job_id=? AND user_id=? AND status='pending';
-            """,
-            (job_id, user_id),
-        )
-        if not row:
-            return False
-
-        await self._db.execute(
-            """
-            UPDATE scheduled_jobs
-            SET status='done',
-                completed_at=?,
-                updated_at=?
-            WHERE job_id=? AND user_id=?;
-            """,
+        rows = await self._db.execute_returning(
+            _SQL_MARK_DONE_FOR_USER,
             (now_iso, now_iso, job_id, user_id),
         )
-        return True
+        return bool(rows)
 
     async def cancel_for_user(self, job_id: str, user_id: int, now_iso: str) -> bool:
-        row = await self._db.fetchone(
-            """
-            SELECT job_id
-            FROM scheduled_jobs
-            WHERE job_id=? AND user_id=? AND status='pending';
-            """,
-            (job_id, user_id),
-        )
-        if not row:
-            return False
-
-        await self._db.execute(
-            """
-            UPDATE scheduled_jobs
-            SET status='cancelled',
-                updated_at=?
-            WHERE job_id=? AND user_id=?;
-            """,
+        rows = await self._db.execute_returning(
+            _SQL_CANCEL_USER_JOB,
             (now_iso, job_id, user_id),
         )
-        return True
-
+        return bool(rows)
 
+    async def update_todo_title(self, job_id: str, user_id: int, title: str, now_iso: str) -> bool:
+        """Rename a pending todo in place (json_set on payload_json); False if there is none."""
+        rows = await self._db.execute_returning(
+            _SQL_UPDATE_TODO_TITLE,
+            (title, now_iso, job_id, user_id),
+        )
+        return bool(rows)
 
     async def get(self, job_id: str) -> Optional[ScheduledJob]:
-        row = await self._db.fetchone("SELECT * FROM scheduled_jobs WHERE job_id = ?;", (job_id,))
-        return self._row_to_job(row) if row else None
+        return await self._db.fetchone(
+            _SQL_GET,
+            (job_id,),
+            mapper=_job_mapper,
+        )
 
     async def list_due(self, now_iso_utc: str, limit: int = 25) -> Sequence[ScheduledJob]:
-        rows = await self._db.fetchall(
-            """
-            SELECT *
-            FROM scheduled_jobs
-            WHERE status = 'pending' AND due_at <= ?
-            ORDER BY due_at ASC
-            LIMIT ?;
-            """,
-            (now_iso_utc, limit),
+        return await self._db.fetchall(
+            _SQL_LIST_DUE,
+            (iso_to_epoch_ms(now_iso_utc), limit),
+            mapper=_job_mapper,
         )
-        return [self._row_to_job(r) for r in rows]
 
-    async def mark_run_ok(self, job_id: str, next_due_at_iso_utc: Optional[str], now_iso: str) -> None:
+    async def claim_due(
+        self,
+        now_iso_utc: str,
+        limit: int,
+        worker_id: str,
+        lease_seconds: int,
+    ) -> list[ScheduledJob]:
+        """
+        Atomically claim up to `limit` runnable jobs for `worker_id` until
+        now + `lease_seconds`, oldest due first. Finish each claimed job with
+        mark_run_ok / mark_run_failed before the lease runs out, or another
+        worker's claim takes it over.
+        """
+        now_ms = iso_to_epoch_ms(now_iso_utc)
+        jobs = await self._db.execute_returning(
+            _SQL_CLAIM_DUE,
+            (worker_id, now_ms + lease_seconds * 1000, now_iso_utc, now_ms, limit, now_ms, limit, limit),
+            mapper=_job_mapper,
+        )
+        # RETURNING order is unspecified
+        jobs.sort(key=lambda j: j.due_at_ms)
+        return jobs
+
+    async def mark_run_ok(
+        self, job_id: str, worker_id: str, next_due_at_iso_utc: Optional[str], now_iso: str
+    ) -> bool:
+        """
+        Record a successful run by the lease owner `worker_id`. False if the
+        job is no longer running under that lease (it expired and another
+        worker claimed it, or it was cancelled): nothing is written then.
+        """
         # if next_due_at is None => complete job
         if next_due_at_iso_utc is None:
-            await self._db.execute(
-                """
-                UPDATE scheduled_jobs
-                SET status='done',
-                    completed_at=?,
-                    last_run_at=?,
-                    run_count=run_count+1,
-                    last_error=NULL,
-                    updated_at=?
-                WHERE job_id=?;
-                """,
-                (now_iso, now_iso, now_iso, job_id),
+            rows = await self._db.execute_returning(
+                _SQL_RUN_OK_COMPLETE_RET,
+                (now_iso, now_iso, now_iso, job_id, worker_id),
             )
-            return
+            return bool(rows)
 
-        await self._db.execute(
-            """
-            UPDATE scheduled_jobs
-            SET due_at=?,
-                last_run_at=?,
-                run_count=run_count+1,
-                last_error=NULL,
-                updated_at=?
-            WHERE job_id=?;
-            """,
-            (next_due_at_iso_utc, now_iso, now_iso, job_id),
+        rows = await self._db.execute_returning(
+            _SQL_RUN_OK_RESCHEDULE_RET,
+            (next_due_at_iso_utc, iso_to_epoch_ms(next_due_at_iso_utc), now_iso, now_iso, job_id, worker_id),
         )
+        return bool(rows)
 
-    async def mark_run_failed(self, job_id: str, error: str, now_iso: str) -> None:
-        await self._db.execute(
-            """
-            UPDATE scheduled_jobs
-            SET status='failed',
-                last_run_at=?,
-                run_count=run_count+1,
-                last_error=?,
-                updated_at=?
-            WHERE job_id=?;
-            """,
-            (now_iso, error[:2000], now_iso, job_id),
+    async def mark_run_failed(self, job_id: str, worker_id: str, error: str, now_iso: str) -> bool:
+        """Same lease check as mark_run_ok()."""
+        rows = await self._db.execute_returning(
+            _SQL_RUN_FAILED_RET,
+            (now_iso, error[:2000], now_iso, job_id, worker_id),
         )
+        return bool(rows)
+
+    async def record_outcomes(self, outcomes: Sequence[RunOutcome]) -> list[RunOutcome]:
+        """
+        mark_run_ok / mark_run_failed for a whole batch: one transaction,
+        one executemany per kind, one commit. Returns the outcomes that were
+        not written because their worker no longer holds the job's lease.
+        """
+        if not outcomes:
+            return []
+        async with self._db.transaction() as tx:
+            ids = json.dumps([o.job_id for o in outcomes])
+            owners = {r[0]: r[1] for r in await tx.fetchall(_SQL_LEASE_OWNERS, (ids,))}
+            complete, reschedule, failed, stale = [], [], [], []
+            for o in outcomes:
+                at = o.finished_at_iso
+                if owners.get(o.job_id) != o.worker_id:
+                    stale.append(o)
+                elif o.error is not None:
+                    failed.append((at, o.error[:2000], at, o.job_id, o.worker_id))
+                elif o.next_due_at_iso_utc is None:
+                    complete.append((at, at, at, o.job_id, o.worker_id))
+                else:
+                    due = o.next_due_at_iso_utc
+                    reschedule.append((due, iso_to_epoch_ms(due), at, at, o.job_id, o.worker_id))
+            # the statements check the lease too; inside this transaction
+            # nothing can change it between the SELECT and them
+            if complete:
+                await tx.executemany(_SQL_RUN_OK_COMPLETE, complete)
+            if reschedule:
+                await tx.executemany(_SQL_RUN_OK_RESCHEDULE, reschedule)
+            if failed:
+                await tx.executemany(_SQL_RUN_FAILED, failed)
+        return stale
+
+    async def release_claims(self, jobs: Sequence[ScheduledJob], worker_id: str, now_iso: str) -> None:
+        """Hand claimed-but-not-run jobs back to pending (only while `worker_id` holds them)."""
+        if jobs:
+            await self._db.executemany(_SQL_RELEASE_CLAIM, [(now_iso, j.job_id, worker_id) for j in jobs])
 
     async def cancel(self, job_id: str, now_iso: str) -> None:
         await self._db.execute(
-            """
-            UPDATE scheduled_jobs
-            SET status='cancelled',
-                updated_at=?
-            WHERE job_id=?;
-            """,
+            _SQL_CANCEL,
             (now_iso, job_id),
         )
 
     async def list_pending_for_user(self, user_id: int, limit: int = 50) -> Sequence[ScheduledJob]:
-        rows = await self._db.fetchall(
-            """
-            SELECT *
-            FROM scheduled_jobs
-            WHERE user_id=? AND status='pending'
-            ORDER BY due_at ASC
-            LIMIT ?;
-            """,
+        return await self._db.fetchall(
+            _SQL_LIST_PENDING_FOR_USER,
             (user_id, limit),
+            mapper=_job_mapper,
         )
-        return [self._row_to_job(r) for r in rows]
-
-    def _row_to_job(self, row) -> ScheduledJob:
-        schedule = json.loads(row["schedule_json"]) if row["schedule_json"] else {}
-        payload = json.loads(row["payload_json"]) if row["payload_json"] else {}
-        return ScheduledJob(
-            job_id=row["job_id"],
-            user_id=int(row["user_id"]),
-            agent_id=row["agent_id"],
-            job_type=row["job_type"],
-            schedule_kind=row["schedule_kind"],
-            schedule=schedule,
-            payload=payload,
-            status=row["status"],
-            due_at=row["due_at"],
-            created_at=row["created_at"],
-            updated_at=row["updated_at"],
-            run_count=int(row["run_count"] or 0),
-            last_run_at=row["last_run_at"],
-            last_error=row["last_error"],
-            completed_at=row["completed_at"],
-        )
+
+    async def iter_jobs(
+        self,
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[ScheduledJob]:
+        """
+        Stream jobs (optionally filtered) in job_id order with bounded memory.
+        Meant for exports / archival over the whole table.
+        """
+        params = [p for p in (user_id, status) if p is not None]
+        async for job in self._db.iterate(
+            _SQL_ITER_JOBS[(user_id is not None, status is not None)],
+            params,
+            batch_size=batch_size,
+            mapper=_job_mapper,
+        ):
+            yield job
+
+
+def job_spec_rows(specs: Sequence[JobSpec], now_iso: str) -> list[tuple]:
+    """
+    Validate and serialize specs into jobs.create parameters. Raises
+    ValidationError naming every invalid spec (by index and job_id).
+    """
+    rows, problems = [], []
+    for i, spec in enumerate(specs):
+        try:
+            rows.append(_job_row(spec, now_iso))
+        except ValueError as e:
+            problems.append(f"#{i} {spec.job_id!r}: {e}")
+    if problems:
+        raise ValidationError("invalid job specs: " + "; ".join(problems))
+    return rows
+
+
+def _job_row(spec: JobSpec, now_iso: str) -> tuple:
+    """_SQL_CREATE parameters for one spec; ValueError says what is wrong with it."""
+    if not isinstance(spec.job_id, str) or not spec.job_id:
+        raise ValueError("job_id must be a non-empty string")
+    if not isinstance(spec.user_id, int) or isinstance(spec.user_id, bool):
+        raise ValueError("user_id must be an int")
+    for name in ("agent_id", "job_type"):
+        if not isinstance(getattr(spec, name), str) or not getattr(spec, name):
+            raise ValueError(f"{name} must be a non-empty string")
+    if spec.schedule_kind not in SCHEDULE_KINDS:
+        raise ValueError(f"schedule_kind must be one of {', '.join(SCHEDULE_KINDS)}")
+    if spec.schedule_kind == "interval":
+        minutes = spec.schedule.get("minutes")
+        if not isinstance(minutes, int) or isinstance(minutes, bool) or minutes <= 0:
+            raise ValueError("interval jobs need a positive int schedule['minutes']")
+
+    due = spec.due_at_iso_utc
+    if spec.schedule_kind == MANUAL_SCHEDULE_KIND:
+        if due is not None:
+            raise ValueError("manual jobs have no due_at")
+        due = UNTIMED_DUE_AT
+    elif due is None:
+        raise ValueError(f"{spec.schedule_kind} jobs need a due_at")
+    try:
+        due_ms = iso_to_epoch_ms(due)
+    except (TypeError, ValueError):
+        raise ValueError(f"due_at {due!r} is not an ISO 8601 timestamp") from None
+
+    try:
+        schedule_json = json.dumps(spec.schedule, ensure_ascii=False) if spec.schedule else None
+        payload_json = json.dumps(spec.payload, ensure_ascii=False) if spec.payload else None
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"schedule / payload is not JSON-serializable ({e})") from None
+
+    return (
+        spec.job_id, spec.user_id, spec.agent_id,
+        spec.job_type, spec.schedule_kind, schedule_json, payload_json,
+        due, due_ms, now_iso, now_iso,
+    )
@@ -0,0 +1,223 @@
+# app/infra/db/repo/sharded.py
+from __future__ import annotations
+
+import heapq
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+from app.domain.oppari.models import WorklogEntry
+from app.domain.oppari.ports import WorklogRepository
+from app.infra.db.queries import query
+from app.infra.db.repo.oppari_sqlite import OppariSqliteRepo
+from app.infra.db.repo.scheduled_jobs_sqlite import (
+    CreateManyResult,
+    JobSpec,
+    RunOutcome,
+    ScheduledJob,
+    ScheduledJobsRepo,
+    TodoPage,
+    job_spec_rows,
+)
+from app.infra.db.sharding import ShardedDatabase
+from app.infra.db.users import UserDirectory
+
+_SQL_HAS_JOB = query("sharded.locate_job", "SELECT 1 FROM scheduled_jobs WHERE job_id = ?;")
+_SQL_HAS_ENTRY = query("sharded.locate_entry", "SELECT 1 FROM worklog_entries WHERE entry_id = ?;")
+
+
+class ShardedScheduledJobsRepo:
+    """
+    ScheduledJobsRepo over a ShardedDatabase. User-scoped calls go to the
+    user's shard; `list_due` / `claim_due` are fanned out and merged by
+    due_at_ms (a claim takes up to `limit` per shard); calls that
+    only know a job_id look the job up on all shards (parallel reads) and
+    write to the one that has it.
+    """
+
+    def __init__(self, shards: ShardedDatabase) -> None:
+        self._shards = shards
+        self._repos = [ScheduledJobsRepo(db) for db in shards.shards]
+
+    def _for_user(self, user_id: int) -> ScheduledJobsRepo:
+        return self._repos[self._shards.index_for(user_id)]
+
+    async def _locate(self, job_id: str) -> Optional[ScheduledJobsRepo]:
+        hits = await self._shards.fan_out(
+            lambda db: db.fetchone(_SQL_HAS_JOB, (job_id,))
+        )
+        for repo, hit in zip(self._repos, hits):
+            if hit is not None:
+                return repo
+        return None
+
+    # --- user-scoped ---
+
+    async def create(self, job_id: str, user_id: int, *args: Any, **kwargs: Any) -> None:
+        await self._for_user(user_id).create(job_id, user_id, *args, **kwargs)
+
+    async def create_many(self, specs: Sequence[JobSpec], now_iso: str) -> CreateManyResult:
+        # validate everything before any shard commits; then one transaction
+        # per shard touched. job_ids are only checked for conflicts on their
+        # user's shard, as with create()
+        job_spec_rows(specs, now_iso)
+        by_shard: dict[int, list[JobSpec]] = {}
+        for spec in specs:
+            by_shard.setdefault(self._shards.index_for(spec.user_id), []).append(spec)
+        created, conflicts = [], []
+        for i, batch in by_shard.items():
+            result = await self._repos[i].create_many(batch, now_iso)
+            created += result.created
+            conflicts += result.conflicts
+        # back to input order (first occurrence of each job_id)
+        order: dict[str, int] = {}
+        for i, spec in enumerate(specs):
+            order.setdefault(spec.job_id, i)
+        created.sort(key=order.__getitem__)
+        conflicts.sort(key=order.__getitem__)
+        return CreateManyResult(created, conflicts)
+
+    async def ensure_recurring(self, job_id: str, user_id: int, *args: Any, **kwargs: Any) -> None:
+        await self._for_user(user_id).ensure_recurring(job_id, user_id, *args, **kwargs)
+
+    async def create_todo(self, job_id: str, user_id: int, *args: Any, **kwargs: Any) -> None:
+        await self._for_user(user_id).create_todo(job_id, user_id, *args, **kwargs)
+
+    async def list_pending_todos_for_user(self, user_id: int, limit: int = 5000) -> list[ScheduledJob]:
+        return await self._for_user(user_id).list_pending_todos_for_user(user_id, limit)
+
+    async def list_todo_page(
+        self, user_id: int, page_size: int = 8, after_token: Optional[str] = None
+    ) -> TodoPage:
+        return await self._for_user(user_id).list_todo_page(user_id, page_size, after_token)
+
+    async def list_pending_for_user(self, user_id: int, limit: int = 50) -> Sequence[ScheduledJob]:
+        return await self._for_user(user_id).list_pending_for_user(user_id, limit)
+
+    async def cancel_top_todo_for_user(self, user_id: int, now_iso: str) -> bool:
+        return await self._for_user(user_id).cancel_top_todo_for_user(user_id, now_iso)
+
+    async def cancel_all_todos_for_user(self, user_id: int, now_iso: str) -> int:
+        return await self._for_user(user_id).cancel_all_todos_for_user(user_id, now_iso)
+
+    async def mark_done_for_user(self, job_id: str, user_id: int, now_iso: str) -> bool:
+        return await self._for_user(user_id).mark_done_for_user(job_id, user_id, now_iso)
+
+    async def cancel_for_user(self, job_id: str, user_id: int, now_iso: str) -> bool:
+        return await self._for_user(user_id).cancel_for_user(job_id, user_id, now_iso)
+
+    async def update_todo_title(self, job_id: str, user_id: int, title: str, now_iso: str) -> bool:
+        return await self._for_user(user_id).update_todo_title(job_id, user_id, title, now_iso)
+
+    # --- cross-shard ---
+
+    async def list_due(self, now_iso_utc: str, limit: int = 25) -> Sequence[ScheduledJob]:
+        per_shard = await self._shards.fan_out(
+            lambda db: ScheduledJobsRepo(db).list_due(now_iso_utc, limit)
+        )
+        merged = heapq.merge(*per_shard, key=lambda j: j.due_at_ms)
+        return [job for _, job in zip(range(limit), merged)]
+
+    async def claim_due(self, now_iso_utc: str, limit: int, worker_id: str, lease_seconds: int) -> list[ScheduledJob]:
+        # every claimed job must be run, so merge without cutting back to `limit`
+        per_shard = await self._shards.fan_out(
+            lambda db: ScheduledJobsRepo(db).claim_due(now_iso_utc, limit, worker_id, lease_seconds)
+        )
+        return list(heapq.merge(*per_shard, key=lambda j: j.due_at_ms))
+
+    async def get(self, job_id: str) -> Optional[ScheduledJob]:
+        repo = await self._locate(job_id)
+        return await repo.get(job_id) if repo is not None else None
+
+    async def mark_run_ok(
+        self, job_id: str, worker_id: str, next_due_at_iso_utc: Optional[str], now_iso: str
+    ) -> bool:
+        repo = await self._locate(job_id)
+        return repo is not None and await repo.mark_run_ok(job_id, worker_id, next_due_at_iso_utc, now_iso)
+
+    async def mark_run_failed(self, job_id: str, worker_id: str, error: str, now_iso: str) -> bool:
+        repo = await self._locate(job_id)
+        return repo is not None and await repo.mark_run_failed(job_id, worker_id, error, now_iso)
+
+    async def record_outcomes(self, outcomes: Sequence[RunOutcome]) -> list[RunOutcome]:
+        # outcomes carry user_id, so no lookup: one transaction per shard touched
+        by_shard: dict[int, list[RunOutcome]] = {}
+        for o in outcomes:
+            by_shard.setdefault(self._shards.index_for(o.user_id), []).append(o)
+        stale: list[RunOutcome] = []
+        for i, batch in by_shard.items():
+            stale += await self._repos[i].record_outcomes(batch)
+        return stale
+
+    async def release_claims(self, jobs: Sequence[ScheduledJob], worker_id: str, now_iso: str) -> None:
+        by_shard: dict[int, list[ScheduledJob]] = {}
+        for j in jobs:
+            by_shard.setdefault(self._shards.index_for(j.user_id), []).append(j)
+        for i, batch in by_shard.items():
+            await self._repos[i].release_claims(batch, worker_id, now_iso)
+
+    async def cancel(self, job_id: str, now_iso: str) -> None:
+        repo = await self._locate(job_id)
+        if repo is not None:
+            await repo.cancel(job_id, now_iso)
+
+    async def iter_jobs(
+        self,
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[ScheduledJob]:
+        repos = [self._for_user(user_id)] if user_id is not None else self._repos
+        for repo in repos:
+            async for job in repo.iter_jobs(user_id, status, batch_size):
+                yield job
+
+
+class ShardedOppariRepo(WorklogRepository):
+    """OppariSqliteRepo routed by user_id; agents are registered on every shard."""
+
+    def __init__(self, shards: ShardedDatabase, users: Optional[UserDirectory] = None) -> None:
+        self._shards = shards
+        self._users = users
+        self._repos = [OppariSqliteRepo(db, users) for db in shards.shards]
+
+    def _for_user(self, user_id: int) -> OppariSqliteRepo:
+        return self._repos[self._shards.index_for(user_id)]
+
+    async def ensure_user(self, user_id: int, now_iso: str) -> None:
+        await self._for_user(user_id).ensure_user(user_id, now_iso)
+
+    async def ensure_agent_registered(self, agent_id: str, name: str, category: str, now_iso: str) -> None:
+        if self._users is not None:
+            await self._users.ensure_agent(agent_id, name, category, now_iso)
+            return
+        for repo in self._repos:
+            await repo.ensure_agent_registered(agent_id, name, category, now_iso)
+
+    async def get_open_entry(self, user_id: int, agent_id: str) -> Optional[WorklogEntry]:
+        return await self._for_user(user_id).get_open_entry(user_id, agent_id)
+
+    async def start_entry(self, entry_id: str, user_id: int, *args: Any, **kwargs: Any) -> None:
+        await self._for_user(user_id).start_entry(entry_id, user_id, *args, **kwargs)
+
+    async def end_entry(
+        self,
+        entry_id: str,
+        end_at_iso: str,
+        break_minutes: int,
+        description: str,
+        updated_at_iso: str,
+        metadata: Dict[str, Any],
+    ) -> None:
+        hits = await self._shards.fan_out(
+            lambda db: db.fetchone(_SQL_HAS_ENTRY, (entry_id,))
+        )
+        for repo, hit in zip(self._repos, hits):
+            if hit is not None:
+                await repo.end_entry(entry_id, end_at_iso, break_minutes, description, updated_at_iso, metadata)
+                return
+
+    async def list_recent(self, user_id: int, agent_id: str, limit: int) -> Sequence[WorklogEntry]:
+        return await self._for_user(user_id).list_recent(user_id, agent_id, limit)
+
+    async def iter_entries(self, user_id: int, agent_id: str, batch_size: int = 500) -> AsyncIterator[WorklogEntry]:
+        async for entry in self._for_user(user_id).iter_entries(user_id, agent_id, batch_size):
+            yield entry
@@ -0,0 +1,140 @@
+# app/infra/db/retry.py
+from __future__ import annotations
+
+import asyncio
+import random
+import sqlite3
+import sys
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+_RETRYABLE_MESSAGES = (
+    "database is locked",
+    "database is busy",
+    "database table is locked",
+    "database schema is locked",  # shared-cache (in-memory) table locks
+)
+
+# frames from these modules are plumbing, not call sites
+_INTERNAL_PREFIXES = (
+    "app.infra.db.connection",
+    "app.infra.db.writer",
+    "app.infra.db.pool",
+    "app.infra.db.retry",
+    "app.infra.db.worker",
+    "asyncio",
+    "contextlib",
+)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """SQLITE_BUSY / SQLITE_LOCKED surface as OperationalError with these messages."""
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    msg = str(exc).lower()
+    return any(m in msg for m in _RETRYABLE_MESSAGES)
+
+
+def call_site(skip: int = 1) -> str:
+    """`module:function` of the first frame outside the DB plumbing."""
+    frame = sys._getframe(skip)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_INTERNAL_PREFIXES):
+            return f"{module}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 6
+    base_delay_ms: float = 10.0
+    max_delay_ms: float = 1000.0
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff, in seconds."""
+        cap = min(self.max_delay_ms, self.base_delay_ms * (2 ** attempt))
+        return random.uniform(0, cap) / 1000.0
+
+
+@dataclass
+class SiteContention:
+    lock_errors: int = 0
+    retries: int = 0
+    recovered: int = 0
+    give_ups: int = 0
+    backoff_ms: float = 0.0
+
+
+class ContentionStats:
+    """Lock errors, retries and give-ups per call site."""
+
+    def __init__(self) -> None:
+        self._sites: dict[str, SiteContention] = {}
+
+    def _site(self, site: str) -> SiteContention:
+        st = self._sites.get(site)
+        if st is None:
+            st = self._sites[site] = SiteContention()
+        return st
+
+    def on_lock_error(self, sites: Iterable[str], backoff_s: float | None) -> None:
+        for site in sites:
+            st = self._site(site)
+            st.lock_errors += 1
+            if backoff_s is None:
+                st.give_ups += 1
+            else:
+                st.retries += 1
+                st.backoff_ms += backoff_s * 1000.0
+
+    def on_recovered(self, sites: Iterable[str]) -> None:
+        for site in sites:
+            self._site(site).recovered += 1
+
+    def sites(self) -> dict[str, SiteContention]:
+        return dict(self._sites)
+
+    def totals(self) -> SiteContention:
+        total = SiteContention()
+        for st in self._sites.values():
+            total.lock_errors += st.lock_errors
+            total.retries += st.retries
+            total.recovered += st.recovered
+            total.give_ups += st.give_ups
+            total.backoff_ms += st.backoff_ms
+        return total
+
+
+async def run_with_retry(
+    op: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    stats: ContentionStats,
+    sites: Callable[[], Iterable[str]],
+) -> T:
+    """
+    Run `op` again after a jittered backoff while it fails with a retryable
+    lock error. Only pass operations that are safe to repeat: reads, or a
+    write transaction that was fully rolled back before re-running.
+    """
+    attempt = 0
+    while True:
+        try:
+            result = await op()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if attempt + 1 >= policy.max_attempts:
+                stats.on_lock_error(sites(), None)
+                raise
+            backoff = policy.delay(attempt)
+            stats.on_lock_error(sites(), backoff)
+            attempt += 1
+            await asyncio.sleep(backoff)
+            continue
+        if attempt:
+            stats.on_recovered(sites())
+        return result
@@ -0,0 +1,53 @@
+# app/infra/db/rows.py
+from __future__ import annotations
+
+import inspect
+import sqlite3
+from typing import Any, Callable, Sequence
+
+# sqlite3 row_factory signature: (cursor, raw tuple) -> mapped object
+RowMapper = Callable[[sqlite3.Cursor, tuple], Any]
+
+
+def select_list(columns: Sequence[str], alias: str = "") -> str:
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(prefix + c for c in columns)
+
+
+def compile_mapper(factory: Callable[..., Any], columns: Sequence[str]) -> RowMapper:
+    """
+    Build a positional row mapper for a query whose SELECT list is `columns`.
+
+    `factory` is called with the raw tuple unpacked, so its parameter names
+    must line up with `columns`. That is checked here, once, when the query
+    is defined, instead of doing a name lookup per column on every row.
+
+    Plain dataclasses (no __post_init__) skip the generated __init__, which
+    is slow for frozen dataclasses, and get their __dict__ filled directly.
+
+    The mapper is installed as the cursor's row_factory, so it runs in the
+    SQLite thread while rows are fetched.
+    """
+    columns = tuple(columns)
+    names = tuple(inspect.signature(factory).parameters)
+    if names != columns:
+        raise ValueError(f"{factory.__name__} parameters {names} do not match query columns {columns}")
+
+    if (
+        isinstance(factory, type)
+        and "__dataclass_fields__" in vars(factory)
+        and not hasattr(factory, "__post_init__")
+        and not getattr(factory, "__slots__", None)
+    ):
+        new = object.__new__
+
+        def _map(cursor: sqlite3.Cursor, row: tuple) -> Any:
+            obj = new(factory)
+            obj.__dict__.update(zip(columns, row))
+            return obj
+    else:
+        def _map(cursor: sqlite3.Cursor, row: tuple) -> Any:
+            return factory(*row)
+
+    _map.columns = columns  # type: ignore[attr-defined]
+    return _map
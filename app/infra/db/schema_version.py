@@ -1,28 +1,176 @@
 from __future__ import annotations
 
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Optional
+
 from app.infra.db.connection import Database
 
+# the migrations shipped with the app
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
 
-async def apply_migrations(db: Database, migrations_dir: str, now_iso: str) -> None:
-    await db.execute(
-        "CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY, applied_at TEXT NOT NULL);"
-    )
+# first line of a migration that cannot run inside a transaction (VACUUM, ...)
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+
+class MigrationDriftError(RuntimeError):
+    """An already applied migration file was changed after it ran."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    path: Path
+    sql: str
+    checksum: str
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+
+@dataclass
+class MigrationReport:
+    applied: list[tuple[int, float]] = field(default_factory=list)  # (version, ms)
+    current: int = 0
+    elapsed_ms: float = 0.0
 
-    dir_path = Path(migrations_dir)
-    files = sorted([p for p in dir_path.glob("*.sql") if p.is_file()])
+    def summary(self) -> str:
+        if not self.applied:
+            return f"schema current ({self.current} migrations, {self.elapsed_ms:.1f} ms)"
+        steps = ", ".join(f"{v:04d} {ms:.1f} ms" for v, ms in self.applied)
+        return f"applied {len(self.applied)} migrations in {self.elapsed_ms:.1f} ms: {steps}"
 
+
+def _checksum(sql: str) -> str:
+    # line endings vary between checkouts; they are not a schema change
+    return hashlib.sha256(sql.replace("\r\n", "\n").encode("utf-8")).hexdigest()
+
+
+def _files(migrations_dir: str) -> list[Path]:
+    return [p for p in sorted(Path(migrations_dir).glob("*.sql")) if p.is_file()]
+
+
+def _fingerprint(files: list[Path]) -> str:
+    # names, sizes and mtimes only: a stat per file, nothing is read
+    h = hashlib.sha256()
     for p in files:
-        version = int(p.stem.split("_")[0])
+        st = p.stat()
+        h.update(f"{p.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
 
-        row = await db.fetchone("SELECT version FROM schema_migrations WHERE version = ?;", (version,))
-        if row:
-            continue
 
+def _load(files: list[Path]) -> list[Migration]:
+    out = []
+    for p in files:
         sql = p.read_text(encoding="utf-8")
-        await db.executescript(sql)
+        out.append(Migration(int(p.stem.split("_")[0]), p, sql, _checksum(sql)))
+    return out
+
+
+async def _stored_fingerprint(db: Database) -> Optional[str]:
+    try:
+        row = await db.fetchone("SELECT value FROM schema_fingerprint WHERE key = 'migrations';")
+    except sqlite3.OperationalError as e:
+        if "no such table" in str(e):
+            return None
+        raise
+    return row[0] if row else None
+
+
+async def _store_fingerprint(db: Database, fingerprint: str) -> None:
+    await db.execute("CREATE TABLE IF NOT EXISTS schema_fingerprint (key TEXT PRIMARY KEY, value TEXT NOT NULL);")
+    await db.execute(
+        "INSERT INTO schema_fingerprint(key, value) VALUES ('migrations', ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value;",
+        (fingerprint,),
+    )
+
+
+def _quote(s: str) -> str:
+    return "'" + s.replace("'", "''") + "'"
+
+
+async def _applied_versions(db: Database) -> dict[int, str | None]:
+    """version -> checksum, in one query. Creates / upgrades the table if needed."""
+    try:
+        rows = await db.fetchall("SELECT version, checksum FROM schema_migrations;")
+        return {int(r[0]): r[1] for r in rows}
+    except sqlite3.OperationalError as e:
+        msg = str(e)
+        if "no such table" in msg:
+            await db.execute(
+                "CREATE TABLE IF NOT EXISTS schema_migrations "
+                "(version INTEGER PRIMARY KEY, applied_at TEXT NOT NULL, checksum TEXT);"
+            )
+        elif "no such column" in msg:
+            await db.execute("ALTER TABLE schema_migrations ADD COLUMN checksum TEXT;")
+        else:
+            raise
+    rows = await db.fetchall("SELECT version, checksum FROM schema_migrations;")
+    return {int(r[0]): r[1] for r in rows}
+
+
+async def apply_migrations(db: Database, migrations_dir: str, now_iso: str) -> MigrationReport:
+    """
+    Apply pending `NNNN_name.sql` files in version order.
+
+    Fast path: after a full run the directory's fingerprint (file names,
+    sizes, mtimes) is stored in the database. If it still matches on the
+    next start, every file was applied and checked already, so nothing is
+    read or hashed: one stat per file and one query. Any edit, added file
+    or fresh checkout changes the fingerprint and takes the full path.
+
+    Full path: applied versions and checksums are loaded in one query;
+    when nothing is pending and nothing drifted, the only write is the
+    new fingerprint. Each pending
+    migration runs together with its schema_migrations row in one
+    transaction, so a failing migration leaves no trace. Files starting with
+    NO_TRANSACTION_MARKER run as-is and are recorded afterwards.
+
+    Raises MigrationDriftError if an applied file no longer matches its
+    stored checksum. Rows from before checksums existed are backfilled.
+    """
+    started = time.perf_counter()
+    report = MigrationReport()
+    files = _files(migrations_dir)
+    fingerprint = _fingerprint(files)
+    if await _stored_fingerprint(db) == fingerprint:
+        report.current = len(files)
+        report.elapsed_ms = (time.perf_counter() - started) * 1000.0
+        return report
+
+    migrations = _load(files)
+    applied = await _applied_versions(db)
+
+    drifted = [m.path.name for m in migrations if applied.get(m.version) not in (None, m.checksum)]
+    if drifted:
+        raise MigrationDriftError(f"applied migrations changed on disk: {', '.join(drifted)}")
+
+    backfill = [(m.checksum, m.version) for m in migrations if m.version in applied and applied[m.version] is None]
+    if backfill:
+        await db.executemany("UPDATE schema_migrations SET checksum=? WHERE version=?;", backfill)
+
+    for m in migrations:
+        if m.version in applied:
+            continue
+        t0 = time.perf_counter()
+        record = (
+            "INSERT INTO schema_migrations(version, applied_at, checksum) "
+            f"VALUES ({m.version}, {_quote(now_iso)}, {_quote(m.checksum)});"
+        )
+        if m.transactional:
+            # the writer rolls back the open transaction if the script fails
+            await db.executescript(f"BEGIN IMMEDIATE;\n{m.sql}\n;\n{record}\nCOMMIT;")
+        else:
+            await db.executescript(m.sql)
+            await db.executescript(record)
+        report.applied.append((m.version, (time.perf_counter() - t0) * 1000.0))
 
-        await db.execute(
-            "INSERT INTO schema_migrations(version, applied_at) VALUES (?, ?);",
-            (version, now_iso),
-        )
\ No newline at end of file
+    await _store_fingerprint(db, fingerprint)
+    report.current = len(migrations)
+    report.elapsed_ms = (time.perf_counter() - started) * 1000.0
+    return report
@@ -0,0 +1,72 @@
+# app/infra/db/sharding.py
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Sequence, TypeVar
+
+from app.infra.db.connection import Database
+
+T = TypeVar("T")
+
+# tables whose rows belong to exactly one user (routed by user_id)
+USER_TABLES = ("users", "agent_user_settings", "worklog_entries", "events", "scheduled_jobs")
+# tables copied to every shard (foreign-key targets of the user tables)
+REPLICATED_TABLES = ("agents",)
+
+
+def shard_index(user_id: int, shard_count: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach). Growing from n to n+1 shards
+    moves only ~1/(n+1) of the users, so a split copies little data.
+    """
+    if shard_count <= 1:
+        return 0
+    key = user_id & 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < shard_count:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_paths(db_path: Path, shard_count: int) -> list[Path]:
+    """data/lifeops.db -> [data/lifeops.db] or [data/lifeops.shard0.db, ...]."""
+    if shard_count <= 1:
+        return [db_path]
+    return [db_path.with_name(f"{db_path.stem}.shard{i}{db_path.suffix}") for i in range(shard_count)]
+
+
+class ShardedDatabase:
+    """
+    N independent `Database`s (files), one per shard. Each has its own
+    writer task and SQLite write lock, so writes for users on different
+    shards never contend.
+
+    Per-user data lives on `for_user(user_id)`; `agents` is replicated to
+    every shard so foreign keys hold locally. Cross-user reads (the
+    scheduler's due scan) go through `fan_out`.
+    """
+
+    def __init__(self, paths: Sequence[str], **db_kwargs: Any) -> None:
+        if not paths:
+            raise ValueError("at least one shard path is required")
+        self.shards = [Database(p, **db_kwargs) for p in paths]
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def index_for(self, user_id: int) -> int:
+        return shard_index(user_id, len(self.shards))
+
+    def for_user(self, user_id: int) -> Database:
+        return self.shards[self.index_for(user_id)]
+
+    async def fan_out(self, fn: Callable[[Database], Awaitable[T]]) -> list[T]:
+        """Run `fn` on every shard concurrently; results in shard order."""
+        return list(await asyncio.gather(*(fn(db) for db in self.shards)))
+
+    async def close(self) -> None:
+        for db in self.shards:
+            await db.close()
@@ -0,0 +1,122 @@
+# app/infra/db/users.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Optional, Union
+
+from app.infra.db.connection import Database
+from app.infra.db.queries import query
+from app.infra.db.sharding import ShardedDatabase
+
+log = logging.getLogger(__name__)
+
+_SQL_UPSERT_USER = query("users.upsert", """
+    INSERT INTO users(user_id, created_at, last_seen_at) VALUES (?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET last_seen_at=excluded.last_seen_at;
+""")
+_SQL_TOUCH_USERS = query("users.touch_many", "UPDATE users SET last_seen_at=? WHERE user_id=?;")
+_SQL_INSERT_AGENT = query("users.insert_agent", """
+    INSERT OR IGNORE INTO agents(agent_id, name, category, is_active, created_at)
+    VALUES (?, ?, ?, 1, ?);
+""")
+
+
+class UserDirectory:
+    """
+    Which users / agents this process has already made sure exist, plus a
+    write-behind buffer for `users.last_seen_at`.
+
+    The first `ensure_user` for a user is one upsert; after that it only
+    records the timestamp in memory. Pending timestamps (latest per user)
+    are written every `flush_interval_s` with one executemany per shard,
+    and on `close()`; whatever a flush could not write (failed shard,
+    cancellation) stays buffered for the next one. Rows are assumed not to
+    be deleted behind the process's back.
+    """
+
+    def __init__(self, db: Union[Database, ShardedDatabase], flush_interval_s: float = 5.0) -> None:
+        self._db = db
+        self._interval = flush_interval_s
+        self._known_users: set[int] = set()
+        self._known_agents: set[str] = set()
+        self._last_seen: dict[int, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._closed = False
+
+    def _db_for(self, user_id: int) -> Database:
+        return self._db.for_user(user_id) if isinstance(self._db, ShardedDatabase) else self._db
+
+    def _all(self) -> list[Database]:
+        return self._db.shards if isinstance(self._db, ShardedDatabase) else [self._db]
+
+    async def ensure_user(self, user_id: int, now_iso: str) -> None:
+        if user_id in self._known_users and not self._closed:
+            self._last_seen[user_id] = now_iso
+            if self._task is None:
+                self._task = asyncio.get_running_loop().create_task(self._run())
+            return
+        await self._db_for(user_id).execute(_SQL_UPSERT_USER, (user_id, now_iso, now_iso))
+        self._known_users.add(user_id)
+
+    async def ensure_agent(self, agent_id: str, name: str, category: str, now_iso: str) -> None:
+        """Agents are registered on every shard (see app.infra.db.sharding)."""
+        if agent_id in self._known_agents:
+            return
+        for db in self._all():
+            await db.execute(_SQL_INSERT_AGENT, (agent_id, name, category, now_iso))
+        self._known_agents.add(agent_id)
+
+    async def flush(self) -> int:
+        """
+        Write pending last_seen_at values; returns how many users were touched.
+        Every shard is tried; if one fails its rows are kept (unless a newer
+        touch replaced them) and the first error is raised at the end.
+        """
+        pending, self._last_seen = self._last_seen, {}
+        if not pending:
+            return 0
+        by_db: dict[int, tuple[Database, list[tuple[str, int]]]] = {}
+        for user_id, seen in pending.items():
+            db = self._db_for(user_id)
+            by_db.setdefault(id(db), (db, []))[1].append((seen, user_id))
+        unwritten = dict(by_db)
+        error: Optional[Exception] = None
+        try:
+            for key, (db, rows) in by_db.items():
+                try:
+                    await db.executemany(_SQL_TOUCH_USERS, rows)
+                except Exception as e:
+                    error = error or e
+                    continue
+                del unwritten[key]
+        finally:
+            # also on cancellation: nothing taken from the buffer is lost
+            for _, rows in unwritten.values():
+                for seen, user_id in rows:
+                    self._last_seen.setdefault(user_id, seen)
+        if error is not None:
+            raise error
+        return len(pending) - sum(len(rows) for _, rows in unwritten.values())
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("last_seen_at flush failed")
+
+    async def close(self) -> None:
+        # wake the flush loop and let it finish (cancelling it could cut a
+        # flush short mid-write), then write what is still buffered
+        self._closed = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
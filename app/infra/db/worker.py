@@ -0,0 +1,205 @@
+# app/infra/db/worker.py
+from __future__ import annotations
+
+import asyncio
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from app.infra.db.rows import RowMapper
+
+_name_seq = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class WorkerStats:
+    jobs: int
+    queue_depth: int
+    max_queue_depth: int
+    queue_wait_ms_total: float
+    busy_ms_total: float
+
+    @property
+    def busy_ms_avg(self) -> float:
+        return self.busy_ms_total / self.jobs if self.jobs else 0.0
+
+
+class SqliteWorker:
+    """
+    One sqlite3 connection owned by one long-lived daemon thread.
+
+    Work is sent as plain functions, `run(fn, *args)` calls `fn(conn, *args)`
+    on the worker thread, in submission order, and the awaiting coroutine
+    gets the result or the exception. Helpers below do a whole statement
+    (execute + fetch + close cursor) in one hop instead of one per call.
+
+    Rows default to sqlite3.Row. Transaction handling is the stdlib's
+    (legacy isolation_level), callers issue BEGIN IMMEDIATE themselves.
+    """
+
+    def __init__(self, path: str, uri: bool = False) -> None:
+        self._path = path
+        self._uri = uri
+        self._conn: Optional[sqlite3.Connection] = None
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # submitted is only written by the event loop, the rest only by the
+        # worker thread, so no lock is needed for the counters
+        self._submitted = 0
+        self._done = 0
+        self._max_depth = 0
+        self._queue_wait_ms = 0.0
+        self._busy_ms = 0.0
+
+    async def start(self, pragmas: Sequence[str] = ()) -> None:
+        self._thread = threading.Thread(target=self._loop, name=f"sqlite-{next(_name_seq)}", daemon=True)
+        self._thread.start()
+        await self._submit(self._connect, (tuple(pragmas),))
+
+    def _connect(self, pragmas: tuple[str, ...]) -> None:
+        conn = sqlite3.connect(self._path, uri=self._uri, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            for pragma in pragmas:
+                conn.execute(pragma)
+        except Exception:
+            conn.close()
+            raise
+        self._conn = conn
+
+    def _loop(self) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            fn, args, loop, fut, enqueued_at = item
+            started = time.perf_counter()
+            self._queue_wait_ms += (started - enqueued_at) * 1000.0
+            try:
+                result, error = fn(*args), None
+            except BaseException as e:
+                result, error = None, e
+            self._busy_ms += (time.perf_counter() - started) * 1000.0
+            self._done += 1
+            try:
+                loop.call_soon_threadsafe(_resolve, fut, result, error)
+            except RuntimeError:
+                pass  # loop already closed; nobody is waiting
+
+    def _submit(self, fn: Callable[..., Any], args: tuple) -> "asyncio.Future[Any]":
+        if self._thread is None or self._closed:
+            raise RuntimeError("sqlite worker is not running")
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._submitted += 1
+        self._max_depth = max(self._max_depth, self._submitted - self._done)
+        self._jobs.put((fn, args, loop, fut, time.perf_counter()))
+        return fut
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(conn, *args)` on the worker thread."""
+        return await self._submit(self._call, (fn, args))
+
+    def _call(self, fn: Callable[..., Any], args: tuple) -> Any:
+        return fn(self._conn, *args)
+
+    # --- one-hop helpers ---
+
+    async def execute(self, sql: str, params: Any = ()) -> int:
+        """Returns the rowcount."""
+        return await self._submit(self._execute, (sql, params))
+
+    def _execute(self, sql: str, params: Any) -> int:
+        cur = self._conn.execute(sql, params)
+        try:
+            return cur.rowcount
+        finally:
+            cur.close()
+
+    async def executemany(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> int:
+        return await self._submit(self._executemany, (sql, seq_of_params))
+
+    def _executemany(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> int:
+        cur = self._conn.executemany(sql, seq_of_params)
+        try:
+            return cur.rowcount
+        finally:
+            cur.close()
+
+    async def executescript(self, sql: str) -> None:
+        await self._submit(self._executescript, (sql,))
+
+    def _executescript(self, sql: str) -> None:
+        self._conn.executescript(sql).close()
+
+    async def fetch(self, sql: str, params: Any, mapper: Optional[RowMapper], one: bool) -> Any:
+        return await self._submit(self._fetch, (sql, params, mapper, one))
+
+    def _fetch(self, sql: str, params: Any, mapper: Optional[RowMapper], one: bool) -> Any:
+        cur = self._conn.execute(sql, params)
+        try:
+            if mapper is not None:
+                cur.row_factory = mapper
+            return cur.fetchone() if one else cur.fetchall()
+        finally:
+            cur.close()
+
+    async def open_cursor(self, sql: str, params: Any, mapper: Optional[RowMapper]) -> sqlite3.Cursor:
+        """Cursor for fetchmany(); it must only be used through this worker."""
+        return await self._submit(self._open_cursor, (sql, params, mapper))
+
+    def _open_cursor(self, sql: str, params: Any, mapper: Optional[RowMapper]) -> sqlite3.Cursor:
+        cur = self._conn.execute(sql, params)
+        if mapper is not None:
+            cur.row_factory = mapper
+        return cur
+
+    async def fetchmany(self, cur: sqlite3.Cursor, size: int) -> list[Any]:
+        return await self._submit(cur.fetchmany, (size,))
+
+    async def close_cursor(self, cur: sqlite3.Cursor) -> None:
+        await self._submit(cur.close, ())
+
+    async def commit(self) -> None:
+        await self._submit(self._conn.commit, ())
+
+    async def rollback(self) -> None:
+        await self._submit(self._conn.rollback, ())
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._conn is not None and self._conn.in_transaction
+
+    async def close(self) -> None:
+        if self._thread is None or self._closed:
+            return
+        try:
+            if self._conn is not None:
+                await self._submit(self._conn.close, ())
+        finally:
+            self._closed = True
+            self._jobs.put(None)
+
+    def stats(self) -> WorkerStats:
+        return WorkerStats(
+            jobs=self._done,
+            queue_depth=self._submitted - self._done,
+            max_queue_depth=self._max_depth,
+            queue_wait_ms_total=self._queue_wait_ms,
+            busy_ms_total=self._busy_ms,
+        )
+
+
+def _resolve(fut: asyncio.Future, result: Any, error: Optional[BaseException]) -> None:
+    if fut.cancelled():
+        return
+    if error is not None:
+        fut.set_exception(error)
+    else:
+        fut.set_result(result)
@@ -0,0 +1,311 @@
+# app/infra/db/writer.py
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Optional
+
+from app.infra.db.pool import ConnectionPool
+from app.infra.db.retry import ContentionStats, RetryPolicy, call_site, run_with_retry
+from app.infra.db.rows import RowMapper
+from app.infra.db.worker import SqliteWorker
+
+
+@dataclass(frozen=True)
+class WriterStats:
+    requests: int
+    batches: int
+    commits: int
+    isolated_retries: int
+    max_batch: int
+    queue_depth: int
+
+    @property
+    def avg_batch(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+
+@dataclass
+class _WriteRequest:
+    kind: str  # "execute" | "many" | "returning" | "script" | "tx"
+    sql: str
+    params: Any
+    future: asyncio.Future = field(repr=False)
+    site: str = "<unknown>"
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    mapper: Optional[RowMapper] = None
+    # rows of a "returning" statement, set on the connection's thread
+    result: Any = None
+
+
+class GroupCommitWriter:
+    """
+    Single writer task for a SQLite database.
+
+    Callers enqueue statements and await their future. The writer takes
+    whatever is queued, runs it on one connection inside a single
+    transaction and commits once. The whole batch (BEGIN ... COMMIT) is one
+    job on the connection's thread.
+
+    The straggler window is adaptive: a write that arrives alone is
+    committed right away. Only while writes overlap (the previous batch
+    held more than one request, or more arrived while it was committing)
+    does the writer wait up to `window_ms` for stragglers before taking the
+    next batch. Requests queued during a commit form the next batch anyway.
+
+    A batch that hits SQLITE_BUSY is rolled back and re-run after a jittered
+    backoff (safe: nothing of it was committed). If a statement in a batch
+    fails otherwise, the batch is rolled back and replayed one request per
+    transaction, so only the failing caller sees the error.
+    Scripts (`executescript`) manage their own transaction and always run alone.
+
+    `reserve()` hands the write connection to a caller for an explicit
+    transaction; the writer waits until that transaction ends before it
+    picks up the next batch.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        window_ms: float = 1.0,
+        max_batch: int = 128,
+        observe: Optional[Callable[[str, Any, float, float, int, bool], None]] = None,
+        retry: RetryPolicy = RetryPolicy(),
+        contention: Optional[ContentionStats] = None,
+    ) -> None:
+        self._pool = pool
+        self._observe = observe
+        self._retry = retry
+        self._contention = contention or ContentionStats()
+        self._window = window_ms / 1000.0
+        self._max_batch = max_batch
+        # set after a batch that saw concurrent writes; gates the window
+        self._overlapping = False
+
+        self._queue: Optional[asyncio.Queue[Optional[_WriteRequest]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self._requests = 0
+        self._batches = 0
+        self._commits = 0
+        self._isolated_retries = 0
+        self._max_batch_seen = 0
+
+    async def submit(self, kind: str, sql: str, params: Any = (), mapper: Optional[RowMapper] = None) -> Any:
+        if self._closed:
+            raise RuntimeError("database writer is closed")
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        if kind == "many":
+            # materialize so the batch can be replayed after a rollback
+            params = list(params)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_WriteRequest(kind, sql, params, fut, call_site(), mapper=mapper))
+        return await fut
+
+    @asynccontextmanager
+    async def reserve(self) -> AsyncIterator[SqliteWorker]:
+        """
+        Pin the write connection for one explicit transaction.
+        Commits on clean exit, rolls back if the block raises.
+        """
+        released = asyncio.Event()
+        try:
+            conn = await self.submit("tx", "", released)
+            site = call_site()
+            await run_with_retry(
+                lambda: conn.execute("BEGIN IMMEDIATE;"),
+                self._retry,
+                self._contention,
+                lambda: (site,),
+            )
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    await conn.rollback()
+                raise
+            await conn.commit()
+            self._commits += 1
+        finally:
+            released.set()
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    def stats(self) -> WriterStats:
+        return WriterStats(
+            requests=self._requests,
+            batches=self._batches,
+            commits=self._commits,
+            isolated_retries=self._isolated_retries,
+            max_batch=self._max_batch_seen,
+            queue_depth=self._queue.qsize() if self._queue is not None else 0,
+        )
+
+    # --- writer task ---
+
+    async def _run(self) -> None:
+        queue = self._queue
+        carry: Optional[_WriteRequest] = None
+        stopping = False
+
+        while not stopping:
+            first = carry if carry is not None else await queue.get()
+            carry = None
+            if first is None:
+                break
+
+            if first.kind == "tx":
+                await self._serve_tx(first)
+                continue
+            if first.kind == "script":
+                await self._run_batch([first])
+                continue
+
+            if self._window > 0 and self._overlapping and queue.empty():
+                await asyncio.sleep(self._window)
+
+            batch = [first]
+            while len(batch) < self._max_batch and not queue.empty():
+                req = queue.get_nowait()
+                if req is None:
+                    stopping = True
+                    break
+                if req.kind in ("script", "tx"):
+                    carry = req
+                    break
+                batch.append(req)
+
+            await self._run_batch(batch)
+            self._overlapping = len(batch) > 1 or not queue.empty()
+
+    async def _run_batch(self, batch: list[_WriteRequest]) -> None:
+        live = [r for r in batch if not r.future.cancelled()]
+        if not live:
+            return
+
+        self._batches += 1
+        self._requests += len(live)
+        self._max_batch_seen = max(self._max_batch_seen, len(live))
+
+        try:
+            async with self._pool.connection() as conn:
+                if len(live) == 1:
+                    await self._apply_alone(conn, live[0])
+                    return
+                try:
+                    await self._with_retry(lambda: self._commit(conn, live), live)
+                except Exception:
+                    # isolate the failing request(s)
+                    self._isolated_retries += 1
+                    for req in live:
+                        await self._apply_alone(conn, req)
+                    return
+        except Exception as e:
+            # pool / connection level failure: nobody got a result yet
+            for req in live:
+                if not req.future.done():
+                    req.future.set_exception(e)
+            return
+
+        for req in live:
+            if not req.future.done():
+                req.future.set_result(req.result)
+
+    async def _serve_tx(self, req: _WriteRequest) -> None:
+        if req.future.cancelled():
+            return
+        released: asyncio.Event = req.params
+        self._requests += 1
+        try:
+            async with self._pool.connection() as conn:
+                req.future.set_result(conn)
+                await released.wait()
+        except Exception as e:
+            if not req.future.done():
+                req.future.set_exception(e)
+
+    async def _with_retry(self, op: Callable[[], Any], reqs: list[_WriteRequest]) -> None:
+        await run_with_retry(op, self._retry, self._contention, lambda: [r.site for r in reqs])
+
+    async def _commit(self, conn: SqliteWorker, reqs: list[_WriteRequest]) -> None:
+        """Apply `reqs` in one transaction; on any error roll back completely and re-raise."""
+        timings, error = await conn.run(_apply_batch, reqs)
+        if self._observe is not None:
+            for req, started, elapsed_ms, rows, failed in timings:
+                if req.kind != "script":
+                    # wait = time queued behind other writes before this one ran
+                    wait_ms = (started - req.enqueued_at) * 1000.0
+                    self._observe(req.sql, req.params, elapsed_ms, wait_ms, rows, failed)
+        if error is not None:
+            raise error
+        self._commits += 1
+
+    async def _apply_alone(self, conn: SqliteWorker, req: _WriteRequest) -> None:
+        try:
+            if req.kind == "script":
+                # a script may have committed part of itself; never re-run it
+                await self._commit(conn, [req])
+            else:
+                await self._with_retry(lambda: self._commit(conn, [req]), [req])
+        except Exception as e:
+            if not req.future.done():
+                req.future.set_exception(e)
+            return
+        if not req.future.done():
+            req.future.set_result(req.result)
+
+
+def _apply_batch(
+    conn: sqlite3.Connection, reqs: list[_WriteRequest]
+) -> tuple[list[tuple[_WriteRequest, float, float, int, bool]], Optional[BaseException]]:
+    """
+    Runs on the write connection's thread. Returns per-request
+    (req, started, elapsed_ms, rows, failed) and the error, if any, after
+    rolling the whole batch back.
+    """
+    timings = []
+    try:
+        if reqs[0].kind != "script":
+            conn.execute("BEGIN IMMEDIATE;")
+        for req in reqs:
+            started = time.perf_counter()
+            rows = 0
+            failed = True
+            try:
+                if req.kind == "execute":
+                    rows = conn.execute(req.sql, req.params).rowcount
+                elif req.kind == "many":
+                    rows = conn.executemany(req.sql, req.params).rowcount
+                elif req.kind == "returning":
+                    cur = conn.execute(req.sql, req.params)
+                    if req.mapper is not None:
+                        cur.row_factory = req.mapper
+                    req.result = cur.fetchall()
+                    rows = len(req.result)
+                elif req.kind == "script":
+                    conn.executescript(req.sql)
+                else:
+                    raise ValueError(f"Unknown write kind: {req.kind}")
+                failed = False
+            finally:
+                timings.append((req, started, (time.perf_counter() - started) * 1000.0, rows, failed))
+        conn.commit()
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        return timings, e
+    return timings, None
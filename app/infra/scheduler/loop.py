@@ -2,11 +2,17 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import Awaitable, Callable, Dict, Optional
 
-from app.infra.db.repo.scheduled_jobs_sqlite import ScheduledJobsRepo, ScheduledJob
+from app.infra.db.repo.scheduled_jobs_sqlite import RunOutcome, ScheduledJobsRepo, ScheduledJob
+
+log = logging.getLogger(__name__)
 
 
 def utc_now_iso() -> str:
@@ -16,10 +22,22 @@ def utc_now_iso() -> str:
 RunnerFn = Callable[[ScheduledJob], Awaitable[None]]
 
 
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
 @dataclass
 class SchedulerConfig:
     poll_seconds: int = 10
     batch_limit: int = 25
+    # claimed jobs are leased to this worker; a lease that runs out (crash,
+    # hang) lets another worker take the job over and this worker's result
+    # is dropped. All leases of a tick start at the claim and jobs run one
+    # after another: a tick starts no new job after half the lease (the
+    # rest go back to pending), so keep lease_seconds above twice the
+    # slowest job
+    worker_id: str = field(default_factory=default_worker_id)
+    lease_seconds: int = 600
 
 
 class JobRunner:
@@ -55,24 +73,43 @@ class SchedulerLoop:
             try:
                 await self._tick()
             except Exception:
-                # never crash the bot because of scheduler
-                pass
+                # never crash the bot because of scheduler, but don't hide it either
+                log.exception("scheduler tick failed")
             await asyncio.sleep(self._cfg.poll_seconds)
 
     async def _tick(self) -> None:
         now_utc = utc_now_iso()
-        due = await self._repo.list_due(now_utc, limit=self._cfg.batch_limit)
-        for job in due:
-            await self._execute_one(job)
-
-    async def _execute_one(self, job: ScheduledJob) -> None:
-        now_iso = utc_now_iso()
+        due = await self._repo.claim_due(
+            now_utc,
+            limit=self._cfg.batch_limit,
+            worker_id=self._cfg.worker_id,
+            lease_seconds=self._cfg.lease_seconds,
+        )
+        # outcomes are written together at the end of the tick (one commit);
+        # if the process dies first, the leases expire and the jobs re-run.
+        # Every lease of the batch runs out lease_seconds after the claim:
+        # past half of that, don't start more jobs, release them instead
+        start_by = time.monotonic() + self._cfg.lease_seconds / 2
+        outcomes: list[RunOutcome] = []
+        try:
+            for i, job in enumerate(due):
+                if time.monotonic() > start_by:
+                    log.warning("scheduler: lease half over, releasing %d unstarted jobs", len(due) - i)
+                    await self._repo.release_claims(due[i:], self._cfg.worker_id, utc_now_iso())
+                    break
+                outcomes.append(await self._execute_one(job))
+        finally:
+            stale = await self._repo.record_outcomes(outcomes)
+            for o in stale:
+                log.warning("scheduler: lease on job %s lost before its result was written; result dropped", o.job_id)
+
+    async def _execute_one(self, job: ScheduledJob) -> RunOutcome:
         try:
             await self._runner.run(job)
             next_due = self._compute_next_due(job)
-            await self._repo.mark_run_ok(job.job_id, next_due, now_iso)
         except Exception as e:
-            await self._repo.mark_run_failed(job.job_id, str(e), now_iso)
+            return RunOutcome(job.job_id, job.user_id, self._cfg.worker_id, utc_now_iso(), error=str(e))
+        return RunOutcome(job.job_id, job.user_id, self._cfg.worker_id, utc_now_iso(), next_due_at_iso_utc=next_due)
 
     def _compute_next_due(self, job: ScheduledJob) -> Optional[str]:
         """
@@ -0,0 +1,86 @@
+# app/tools/plancheck.py
+"""
+Query-plan check for every registered repository statement.
+
+  python -m app.tools.plancheck [-v]
+
+Migrates an in-memory database to the current schema, runs EXPLAIN QUERY
+PLAN for each statement registered through app.infra.db.queries.query(),
+and exits non-zero if one does a full table scan (SCAN <table>) or sorts
+through a temp B-tree, unless the statement opted out of that rule.
+Run it after touching repo SQL or the migrations.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+from dataclasses import dataclass
+
+# importing the repo modules registers their statements
+import app.infra.db.repo.oppari_sqlite  # noqa: F401
+import app.infra.db.repo.scheduled_jobs_sqlite  # noqa: F401
+import app.infra.db.repo.sharded  # noqa: F401
+import app.infra.db.users  # noqa: F401
+from app.infra.db.connection import Database
+from app.infra.db.queries import RegisteredQuery, registered
+from app.infra.db.schema_version import MIGRATIONS_DIR, apply_migrations
+
+
+@dataclass(frozen=True)
+class PlanResult:
+    query: RegisteredQuery
+    plan: tuple[str, ...]
+    problems: tuple[str, ...]
+
+
+def problems_in(q: RegisteredQuery, plan: tuple[str, ...]) -> tuple[str, ...]:
+    out = []
+    for detail in plan:
+        # "SCAN CONSTANT ROW" is a VALUES list, "SCAN (subquery-N)" reads a
+        # co-routine's output and a VIRTUAL TABLE scan walks a table-valued
+        # function such as json_each(?) over a bound value; none is a table
+        scans_table = (
+            detail.startswith("SCAN ")
+            and not detail.startswith(("SCAN CONSTANT ROW", "SCAN (subquery"))
+            and "VIRTUAL TABLE" not in detail
+        )
+        if scans_table and not q.allow_scan:
+            out.append(f"full scan: {detail}")
+        if "TEMP B-TREE" in detail and not q.allow_temp_btree:
+            out.append(f"temp b-tree: {detail}")
+    return tuple(out)
+
+
+async def check() -> list[PlanResult]:
+    db = Database.in_memory()
+    try:
+        await apply_migrations(db, str(MIGRATIONS_DIR), "1970-01-01T00:00:00+00:00")
+        results = []
+        for q in registered():
+            # plans don't depend on the bound values, NULLs are enough
+            params = (None,) * q.sql.count("?")
+            rows = await db.fetchall(f"EXPLAIN QUERY PLAN {q.sql}", params)
+            plan = tuple(r[3] for r in rows)
+            results.append(PlanResult(q, plan, problems_in(q, plan)))
+        return results
+    finally:
+        await db.close()
+
+
+def main() -> None:
+    verbose = "-v" in sys.argv[1:]
+    results = asyncio.run(check())
+    failed = [r for r in results if r.problems]
+    for r in results:
+        if r.problems or verbose:
+            print(f"{'FAIL' if r.problems else 'ok  '} {r.query.name}")
+            for detail in r.plan:
+                print(f"       {detail}")
+            for p in r.problems:
+                print(f"     ! {p}")
+    print(f"{len(results)} statements checked, {len(failed)} with plan problems")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# app/tools/reshard.py
+"""
+Move data between shard layouts (see app.infra.db.sharding).
+
+  python -m app.tools.reshard DB_PATH FROM_SHARDS TO_SHARDS [--dry-run]
+
+  python -m app.tools.reshard data/lifeops.db 1 4   # split the single file into 4 shards
+  python -m app.tools.reshard data/lifeops.db 4 5   # add a shard (moves ~1/5 of users)
+  python -m app.tools.reshard data/lifeops.db 4 1   # merge back into one file
+
+Run it with the bot stopped. Both layouts are brought to the current
+migration level first; rows are copied shard-to-shard with ATTACH, so
+nothing is loaded into Python memory. Per-table row counts are verified
+before anything is renamed; the old files are kept as *.pre-reshard.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from app.domain.common.time import to_iso
+from app.infra.clock.system_clock import SystemClock
+from app.infra.db.connection import Database
+from app.infra.db.schema_version import MIGRATIONS_DIR, apply_migrations
+from app.infra.db.sharding import REPLICATED_TABLES, USER_TABLES, shard_index, shard_paths
+
+# FK order: users first
+_COPY_ORDER = ("users",) + tuple(t for t in USER_TABLES if t != "users")
+
+
+def _tmp(p: Path) -> Path:
+    return p.with_name(p.name + ".reshard-tmp")
+
+
+async def _migrate(paths: list[Path]) -> None:
+    now_iso = to_iso(SystemClock("UTC").now())
+    for p in paths:
+        db = Database(str(p))
+        try:
+            await apply_migrations(db, str(MIGRATIONS_DIR), now_iso)
+        finally:
+            await db.close()
+
+
+def _count(conn: sqlite3.Connection, schema: str, table: str) -> int:
+    return conn.execute(f"SELECT COUNT(*) FROM {schema}.{table};").fetchone()[0]
+
+
+def _remove_tmp(targets: list[Path]) -> None:
+    for p in targets:
+        for leftover in (_tmp(p), Path(str(_tmp(p)) + "-wal"), Path(str(_tmp(p)) + "-shm")):
+            leftover.unlink(missing_ok=True)
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> str:
+    # stored columns only: generated ones (hidden 2 / 3 in table_xinfo)
+    # can't be inserted into, and SELECT * would return them
+    rows = conn.execute(f"PRAGMA {schema}.table_xinfo({table});").fetchall()
+    return ", ".join(r[1] for r in rows if r[6] == 0)
+
+
+def _copy(sources: list[Path], targets: list[Path], to_n: int) -> tuple[dict[str, int], list[int]]:
+    """Copy every source into the *.reshard-tmp targets and verify row counts."""
+    expected = {t: 0 for t in USER_TABLES}
+    moved = [0] * to_n
+    for src in sources:
+        conn = sqlite3.connect(src, isolation_level=None)
+        conn.create_function("shard_of", 1, lambda uid: shard_index(uid, to_n), deterministic=True)
+        try:
+            for t in USER_TABLES:
+                expected[t] += _count(conn, "main", t)
+            cols = {t: _columns(conn, "main", t) for t in REPLICATED_TABLES + _COPY_ORDER}
+            for i, dst in enumerate(targets):
+                conn.execute("ATTACH DATABASE ? AS dst;", (str(_tmp(dst)),))
+                conn.execute("BEGIN;")
+                for t in REPLICATED_TABLES:
+                    conn.execute(f"INSERT OR IGNORE INTO dst.{t}({cols[t]}) SELECT {cols[t]} FROM main.{t};")
+                for t in _COPY_ORDER:
+                    cur = conn.execute(
+                        f"INSERT INTO dst.{t}({cols[t]}) SELECT {cols[t]} FROM main.{t} WHERE shard_of(user_id) = ?;",
+                        (i,),
+                    )
+                    if t == "users":
+                        moved[i] += cur.rowcount
+                conn.execute("COMMIT;")
+                conn.execute("DETACH DATABASE dst;")
+            # the source is kept as a backup without its -wal file
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        finally:
+            conn.close()
+
+    # verify before touching the live files
+    actual = {t: 0 for t in USER_TABLES}
+    for dst in targets:
+        conn = sqlite3.connect(_tmp(dst))
+        try:
+            for t in USER_TABLES:
+                actual[t] += _count(conn, "main", t)
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        finally:
+            conn.close()
+    if actual != expected:
+        raise SystemExit(f"row counts differ, nothing renamed: expected {expected}, got {actual}")
+    return expected, moved
+
+
+def reshard(db_path: Path, from_n: int, to_n: int, dry_run: bool = False) -> None:
+    sources = shard_paths(db_path, from_n)
+    missing = [p for p in sources if not p.exists()]
+    if missing:
+        raise SystemExit(f"missing source shard(s): {', '.join(map(str, missing))}")
+    targets = shard_paths(db_path, to_n)
+    started = time.perf_counter()
+
+    _remove_tmp(targets)
+    done = False
+    try:
+        asyncio.run(_migrate(sources + [_tmp(p) for p in targets]))
+        expected, moved = _copy(sources, targets, to_n)
+        done = True
+    finally:
+        if not done:
+            _remove_tmp(targets)
+
+    for i, n in enumerate(moved):
+        print(f"shard {i}: {n} users -> {targets[i].name}")
+    print(f"rows: {expected}  ({(time.perf_counter() - started) * 1000.0:.0f} ms)")
+    if dry_run:
+        _remove_tmp(targets)
+        print("dry run: new shards discarded")
+        return
+
+    for src in sources:
+        os.replace(src, src.with_name(src.name + ".pre-reshard"))
+        for suffix in ("-wal", "-shm"):
+            Path(str(src) + suffix).unlink(missing_ok=True)
+    for dst in targets:
+        os.replace(_tmp(dst), dst)
+        for suffix in ("-wal", "-shm"):
+            Path(str(_tmp(dst)) + suffix).unlink(missing_ok=True)
+    print(f"done; set DB_SHARDS={to_n}. Previous files kept as *.pre-reshard")
+
+
+def main() -> None:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) != 3:
+        raise SystemExit(__doc__)
+    reshard(Path(args[0]), int(args[1]), int(args[2]), dry_run="--dry-run" in sys.argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import html
+
 from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
@@ -30,6 +32,7 @@ async def help_cmd(message: Message):
         "/agent disable [id]\n"
         "/agent info [id]\n"
         "/opp_start /opp_end /opp_status\n"
+        "/dbstats /dbtop [n] /dbslow\n"
         "/ping"
     )
 
@@ -39,6 +42,84 @@ async def ping(message: Message):
     await message.answer("pong")
 
 
+@router.message(Command("dbstats"))
+async def dbstats_cmd(message: Message, db: Database):
+    lines = []
+    for name, p in db.pool_stats().items():
+        lines += [
+            f"<b>DB pool: {name}</b>",
+            f"Connections: {p.opened}/{p.max_size} (idle {p.idle}, in use {p.in_use})",
+            f"Acquires: {p.acquires} (waited {p.waits})",
+            f"Wait ms: avg {p.wait_ms_avg:.2f} • max {p.wait_ms_max:.2f}",
+            f"Hold ms: avg {p.hold_ms_avg:.2f} • max {p.hold_ms_max:.2f}",
+            f"Waiting for a connection: {p.queue_depth} (max {p.max_queue_depth})",
+            f"Thread jobs: {p.thread_jobs} (busy avg {p.thread_busy_ms_avg:.2f} ms) • "
+            f"queued {p.thread_queue_depth} (max {p.thread_max_queue_depth})",
+            f"Health check failures: {p.health_check_failures}",
+            "",
+        ]
+    w = db.writer_stats()
+    await message.answer(
+        "\n".join(lines)
+        + "<b>Writer</b>\n"
+        f"Writes: {w.requests} in {w.batches} batches (avg {w.avg_batch:.1f}, max {w.max_batch})\n"
+        f"Commits: {w.commits} • isolated replays: {w.isolated_retries} • queued: {w.queue_depth}\n"
+        + _contention_text(db)
+    )
+
+
+def _contention_text(db: Database) -> str:
+    t = db.contention.totals()
+    lines = [
+        "\n<b>Lock contention</b>",
+        f"Lock errors: {t.lock_errors} • retries: {t.retries} • recovered: {t.recovered} • "
+        f"gave up: {t.give_ups} • backoff {t.backoff_ms:.0f} ms",
+    ]
+    sites = sorted(db.contention.sites().items(), key=lambda kv: kv[1].lock_errors, reverse=True)
+    for site, st in sites[:5]:
+        lines.append(f"- {html.escape(site)}: {st.lock_errors} errors, {st.retries} retries, {st.give_ups} gave up")
+    return "\n".join(lines)
+
+
+@router.message(Command("dbtop"))
+async def dbtop_cmd(message: Message, db: Database):
+    parts = (message.text or "").split()
+    n = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 10
+
+    top = db.metrics.top(n)
+    if not top:
+        await message.answer("No queries recorded yet.")
+        return
+
+    lines = [f"<b>Top {len(top)} statements by total time</b>"]
+    for st in top:
+        lines.append(
+            f"\n<b>{st.total_ms:.1f} ms</b> • {st.calls} calls • avg {st.avg_ms:.2f} • "
+            f"p95 ≤{st.percentile_ms(0.95):.2f} • max {st.max_ms:.2f} • rows {st.rows} • "
+            f"wait {st.wait_ms:.1f}{f' • errors {st.errors}' if st.errors else ''}\n"
+            f"<code>{html.escape(st.sql[:200])}</code>"
+        )
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("dbslow"))
+async def dbslow_cmd(message: Message, db: Database):
+    slow = db.metrics.slow_queries()[-10:]
+    if not slow:
+        await message.answer(f"No statements over {db.metrics.slow_ms:.0f} ms.")
+        return
+
+    lines = [f"<b>Slow statements (≥ {db.metrics.slow_ms:.0f} ms)</b>"]
+    for q in reversed(slow):
+        plan = "\n".join(f"  {p}" for p in q.plan) or "  -"
+        lines.append(
+            f"\n<b>{q.elapsed_ms:.1f} ms</b> • wait {q.wait_ms:.1f} • rows {q.rows}\n"
+            f"<code>{html.escape(q.sql[:200])}</code>\n"
+            f"<pre>{html.escape(plan)}</pre>"
+        )
+    await message.answer("\n".join(lines))
+
+
 @router.message(Command("status"))
 async def status_cmd(message: Message, db: Database):
     user_id = message.from_user.id
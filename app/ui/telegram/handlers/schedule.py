@@ -9,6 +9,7 @@ from aiogram.filters import Command
 from aiogram.types import Message
 
 from app.infra.db.connection import Database
+from app.infra.db.users import UserDirectory
 from app.infra.clock.system_clock import SystemClock
 from app.domain.common.time import to_iso
 from app.infra.db.repo.scheduled_jobs_sqlite import ScheduledJobsRepo
@@ -27,28 +28,13 @@ def _parse_delay(token: str) -> timedelta:
     return timedelta(minutes=value) if unit == "m" else timedelta(hours=value)
 
 
-async def _ensure_user_and_system_agent(db: Database, user_id: int, now_iso: str) -> None:
-    # user
-    row = await db.fetchone("SELECT user_id FROM users WHERE user_id = ?;", (user_id,))
-    if row:
-        await db.execute("UPDATE users SET last_seen_at=? WHERE user_id=?;", (now_iso, user_id))
-    else:
-        await db.execute(
-            "INSERT INTO users(user_id, created_at, last_seen_at) VALUES (?, ?, ?);",
-            (user_id, now_iso, now_iso),
-        )
-
-    # system agent
-    arow = await db.fetchone("SELECT agent_id FROM agents WHERE agent_id = ?;", (SYSTEM_AGENT_ID,))
-    if not arow:
-        await db.execute(
-            "INSERT INTO agents(agent_id, name, category, is_active, created_at) VALUES (?, ?, ?, 1, ?);",
-            (SYSTEM_AGENT_ID, "System", "core", now_iso),
-        )
+async def _ensure_user_and_system_agent(users: UserDirectory, user_id: int, now_iso: str) -> None:
+    await users.ensure_user(user_id, now_iso)
+    await users.ensure_agent(SYSTEM_AGENT_ID, "System", "core", now_iso)
 
 
 @router.message(Command("schedule"))
-async def schedule_debug(message: Message, db: Database, clock: SystemClock):
+async def schedule_debug(message: Message, db: Database, users: UserDirectory, clock: SystemClock):
     parts = (message.text or "").strip().split()
     if len(parts) != 3:
         await message.reply("Usage: /schedule ping 1 | 10m | 2h")
@@ -66,7 +52,7 @@ async def schedule_debug(message: Message, db: Database, clock: SystemClock):
     now_iso = to_iso(now)
     due_at = now + delta
 
-    await _ensure_user_and_system_agent(db, message.from_user.id, now_iso)
+    await _ensure_user_and_system_agent(users, message.from_user.id, now_iso)
 
     repo = ScheduledJobsRepo(db)
     job_id = str(uuid.uuid4())
@@ -4,59 +4,111 @@ import re
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from zoneinfo import ZoneInfo
 
 from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from app.infra.db.connection import Database
+from app.infra.db.users import UserDirectory
 from app.infra.clock.system_clock import SystemClock
 from app.domain.common.time import to_iso
-from app.infra.db.repo.scheduled_jobs_sqlite import ScheduledJobsRepo, ScheduledJob
+from app.infra.db.repo.scheduled_jobs_sqlite import ScheduledJobsRepo, ScheduledJob, TodoPage
 
 router = Router()
 
 CB_PREFIX = "td"
 SYSTEM_AGENT_ID = "system"
 TODO_JOB_TYPE = "todo"
+# todos per keyboard page; each is one row of three buttons
+TODO_PAGE_SIZE = 8
 
 
 def _job_title(job: ScheduledJob) -> str:
-    title = (job.payload or {}).get("title")
+    title = job.title
     if isinstance(title, str) and title.strip():
         return title.strip()
     return f"{job.job_type} @ {job.due_at}"
 
 
-def _build_list_kb(jobs: list[ScheduledJob]):
+def _page_cb(page: int, token: Optional[str]) -> str:
+    # td:pg:<page>:<token>, token is the last job_id of the previous page
+    return f"{CB_PREFIX}:pg:{page}:{token or ''}"
+
+
+def _build_list_kb(todos: TodoPage, page: int, token: Optional[str]):
     kb = InlineKeyboardBuilder()
 
     # Add button on top (UI finalize later)
     kb.button(text="➕ Lisää", callback_data=f"{CB_PREFIX}:add")
-    kb.adjust(1)
+    rows = [1]
 
-    for job in jobs:
+    for job in todos.jobs:
         title = _job_title(job)
         kb.button(text=f"🟩 {title}", callback_data=f"{CB_PREFIX}:done:{job.job_id}")
         kb.button(text="✏️", callback_data=f"{CB_PREFIX}:edit:{job.job_id}")
         kb.button(text="🗑️", callback_data=f"{CB_PREFIX}:del:{job.job_id}")
-        kb.adjust(1, 3)
-
+        rows.append(3)
+
+    if page > 1 or todos.next_token:
+        # the page-number button re-renders this page; _current_page() finds it by its text
+        nav = 0
+        if page > 1:
+            kb.button(text="⏮", callback_data=_page_cb(1, None))
+            nav += 1
+        kb.button(text=str(page), callback_data=_page_cb(page, token))
+        nav += 1
+        if todos.next_token:
+            kb.button(text="▶", callback_data=_page_cb(page + 1, todos.next_token))
+            nav += 1
+        rows.append(nav)
+
+    kb.adjust(*rows)
     return kb.as_markup()
 
 
-async def _render_list(repo: ScheduledJobsRepo, user_id: int):
-    jobs = list(await repo.list_pending_todos_for_user(user_id=user_id, limit=5000))
-    if not jobs:
+async def _render_list(repo: ScheduledJobsRepo, user_id: int, page: int = 1, token: Optional[str] = None):
+    todos = await repo.list_todo_page(user_id=user_id, page_size=TODO_PAGE_SIZE, after_token=token)
+    if not todos.jobs and token:
+        # everything from here on got done / deleted: back to the first page
+        page, token = 1, None
+        todos = await repo.list_todo_page(user_id=user_id, page_size=TODO_PAGE_SIZE)
+    if not todos.jobs:
         return "Ei tekemättömiä tehtäviä ✅", None
 
+    paged = f" (sivu {page})" if page > 1 or todos.next_token else ""
     text = (
-        f"Tekemättömät ({len(jobs)}):\n\n"
+        f"Tekemättömät{paged}:\n\n"
         "🟩 = done • ✏️ = muokkaa • 🗑️ = poista"
     )
-    return text, _build_list_kb(jobs)
+    return text, _build_list_kb(todos, page, token)
+
+
+def _parse_page(ref: str) -> tuple[int, Optional[str]]:
+    """'<page>:<token>' from a td:pg callback; anything malformed is page 1."""
+    page_s, _, token = ref.partition(":")
+    try:
+        page = int(page_s)
+    except ValueError:
+        return 1, None
+    if page <= 1:
+        return 1, None
+    return page, token or None
+
+
+def _current_page(message: Message) -> tuple[int, Optional[str]]:
+    markup = message.reply_markup
+    for row in (markup.inline_keyboard if markup else []):
+        for button in row:
+            data = button.callback_data or ""
+            prefix = f"{CB_PREFIX}:pg:{button.text}:"
+            if data.startswith(prefix):
+                return _parse_page(data[len(f"{CB_PREFIX}:pg:"):])
+    return 1, None
 
 
 def _parse_delay(token: str) -> timedelta:
@@ -118,28 +170,13 @@ def _parse_due_local(tokens: list[str], tz_name: str, now_local: datetime) -> tu
     raise ValueError
 
 
-async def _ensure_user_and_system_agent(db: Database, user_id: int, now_iso: str) -> None:
-    # users
-    row = await db.fetchone("SELECT user_id FROM users WHERE user_id=?;", (user_id,))
-    if row:
-        await db.execute("UPDATE users SET last_seen_at=? WHERE user_id=?;", (now_iso, user_id))
-    else:
-        await db.execute(
-            "INSERT INTO users(user_id, created_at, last_seen_at) VALUES (?, ?, ?);",
-            (user_id, now_iso, now_iso),
-        )
-
-    # system agent
-    arow = await db.fetchone("SELECT agent_id FROM agents WHERE agent_id=?;", (SYSTEM_AGENT_ID,))
-    if not arow:
-        await db.execute(
-            "INSERT INTO agents(agent_id, name, category, is_active, created_at) VALUES (?, ?, ?, 1, ?);",
-            (SYSTEM_AGENT_ID, "System", "core", now_iso),
-        )
+async def _ensure_user_and_system_agent(users: UserDirectory, user_id: int, now_iso: str) -> None:
+    await users.ensure_user(user_id, now_iso)
+    await users.ensure_agent(SYSTEM_AGENT_ID, "System", "core", now_iso)
 
 
 @router.message(Command(commands=["td", "todo"]))
-async def td_entry(message: Message, db: Database, clock: SystemClock, timezone: str):
+async def td_entry(message: Message, db: Database, users: UserDirectory, clock: SystemClock, timezone: str):
     """
     /td or /todo -> list
     /td help
@@ -187,7 +224,7 @@ async def td_entry(message: Message, db: Database, clock: SystemClock, timezone:
         return
 
     now_iso = to_iso(clock.now())
-    await _ensure_user_and_system_agent(db, user_id, now_iso)
+    await _ensure_user_and_system_agent(users, user_id, now_iso)
 
     # ADD (you prefer /td a and /td add)
     if sub in ("a", "add"):
@@ -239,14 +276,14 @@ async def td_entry(message: Message, db: Database, clock: SystemClock, timezone:
 
         job_id = str(uuid.uuid4())
 
-        # Non-timed todo: put due far in future so it stays list-only
+        # Non-timed todo: list-only, the scheduler never picks it up
         await repo.create_todo(
             job_id=job_id,
             user_id=user_id,
             agent_id=SYSTEM_AGENT_ID,
             title=title,
             chat_id=message.chat.id,
-            due_at_iso_utc="9999-12-31T23:59:59+00:00",
+            due_at_iso_utc=None,
             now_iso=now_iso,
         )
 
@@ -296,6 +333,12 @@ async def td_callbacks(cb: CallbackQuery, db: Database, clock: SystemClock):
         await cb.message.answer("Lisää tehtävä: /td a <tehtävä>\nAjasta: /td add t 18:30 <tehtävä>")
         return
 
+    if action == "pg":
+        page, token = _parse_page(parts[2] if len(parts) == 3 else "")
+        text, kb = await _render_list(repo, user_id, page, token)
+        await _edit_list(cb.message, text, kb)
+        return
+
     if not job_id:
         return
 
@@ -308,9 +351,19 @@ async def td_callbacks(cb: CallbackQuery, db: Database, clock: SystemClock):
     else:
         return
 
-    # refresh list in same message
-    text, kb = await _render_list(repo, user_id)
-    if kb is None:
-        await cb.message.edit_text(text)
-    else:
-        await cb.message.edit_text(text, reply_markup=kb)
+    # refresh the page the tap came from, in the same message
+    page, token = _current_page(cb.message)
+    text, kb = await _render_list(repo, user_id, page, token)
+    await _edit_list(cb.message, text, kb)
+
+
+async def _edit_list(message: Message, text: str, kb) -> None:
+    try:
+        if kb is None:
+            await message.edit_text(text)
+        else:
+            await message.edit_text(text, reply_markup=kb)
+    except TelegramBadRequest as e:
+        # re-tapping the current page number changes nothing
+        if "message is not modified" not in str(e):
+            raise
@@ -18,9 +18,14 @@ from app.config import load_settings
 from app.domain.common.time import to_iso
 from app.domain.oppari.service import OppariService
 from app.infra.clock.system_clock import SystemClock
-from app.infra.db.connection import Database
+from app.infra.db.backup import BACKUP_JOB_TYPE, BackupConfig, BackupService
+from app.infra.db.maintenance import MAINTENANCE_JOB_TYPE, MaintenanceService
 from app.infra.db.schema_version import apply_migrations
 from app.infra.db.repo.oppari_sqlite import OppariSqliteRepo
+from app.infra.db.repo.sharded import ShardedOppariRepo, ShardedScheduledJobsRepo
+from app.infra.db.profiles import get_profile
+from app.infra.db.sharding import ShardedDatabase, shard_paths
+from app.infra.db.users import UserDirectory
 from app.infra.ids.uuid_gen import UuidGenerator
 
 from app.ui.telegram.handlers.cancel import router as cancel_router
@@ -31,7 +36,7 @@ from app.ui.telegram.handlers.oppari import router as oppari_router
 from app.ui.telegram.handlers.schedule import router as schedule_router
 
 from app.infra.db.repo.scheduled_jobs_sqlite import ScheduledJobsRepo
-from app.infra.scheduler.loop import SchedulerLoop, JobRunner
+from app.infra.scheduler.loop import SchedulerLoop, JobRunner, utc_now_iso
 
 
 async def main() -> None:
@@ -49,7 +54,15 @@ async def main() -> None:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     print("DB_PATH:", str(db_path))
 
-    db = Database(str(db_path))
+    # DB_SHARDS (default 1, deliberately not in the README): > 1 splits users
+    # over one file per shard. app.bench.shard_writes shows no throughput
+    # gain for this single-owner bot, so with one shard everything below
+    # gets the plain Database and no shard routing runs at all
+    profile = get_profile(settings.db_profile)
+    print("DB_PROFILE:", profile.name)
+    shards = ShardedDatabase([str(p) for p in shard_paths(db_path, settings.db_shards)], profile=profile)
+    db = shards.for_user(settings.owner_telegram_id)
+    sharded = len(shards) > 1
     clock = SystemClock(settings.timezone)
     ids = UuidGenerator()
 
@@ -57,11 +70,13 @@ async def main() -> None:
     migrations_dir = repo_root / "app" / "infra" / "db" / "migrations"
     print("MIGRATIONS:", str(migrations_dir))
 
-    await apply_migrations(
-        db=db,
-        migrations_dir=str(migrations_dir),
-        now_iso=to_iso(clock.now()),
-    )
+    for shard in shards.shards:
+        migration_report = await apply_migrations(
+            db=shard,
+            migrations_dir=str(migrations_dir),
+            now_iso=to_iso(clock.now()),
+        )
+        print("MIGRATIONS:", Path(shard.path).name, migration_report.summary())
 
     # --- bot/dispatcher ---
     bot = Bot(
@@ -71,7 +86,9 @@ async def main() -> None:
     dp = Dispatcher()
 
     # --- services ---
-    opp_repo = OppariSqliteRepo(db)
+    # known users + buffered last_seen_at, flushed every few seconds and on shutdown
+    users = UserDirectory(shards if sharded else db)
+    opp_repo = ShardedOppariRepo(shards, users) if sharded else OppariSqliteRepo(db, users)
     opp_service = OppariService(repo=opp_repo, clock=clock, ids=ids)
     await opp_service.bootstrap()
 
@@ -79,8 +96,9 @@ async def main() -> None:
     dp.message.middleware(OwnerOnlyMiddleware(settings.owner_telegram_id))
     dp.callback_query.middleware(OwnerOnlyMiddleware(settings.owner_telegram_id))
 
-    dp.message.middleware(DIMiddleware(opp_service, db=db, clock=clock, timezone=settings.timezone))
-    dp.callback_query.middleware(DIMiddleware(opp_service, db=db, clock=clock, timezone=settings.timezone))
+    handler_db = shards if sharded else db
+    dp.message.middleware(DIMiddleware(opp_service, db=handler_db, users=users, clock=clock, timezone=settings.timezone))
+    dp.callback_query.middleware(DIMiddleware(opp_service, db=handler_db, users=users, clock=clock, timezone=settings.timezone))
 
     # --- routers ---
     dp.include_router(cancel_router)
@@ -89,17 +107,60 @@ async def main() -> None:
     dp.include_router(schedule_router)
 
     # --- scheduler (background) ---
-    jobs_repo = ScheduledJobsRepo(db)
+    jobs_repo = ShardedScheduledJobsRepo(shards) if sharded else ScheduledJobsRepo(db)
     runner = JobRunner()
 
     async def run_ping(job):
         await bot.send_message(
-            chat_id=job.payload.get("chat_id", job.user_id),
+            chat_id=job.chat_id or job.user_id,
             text="🏓 Ping job executed!",
         )
 
     runner.register("ping", run_ping)
 
+    # --- db maintenance jobs (owned by the owner user / system agent) ---
+    backup_dir = settings.backup_dir
+    if not backup_dir.is_absolute():
+        backup_dir = repo_root / backup_dir
+    backups = [
+        BackupService(shard.path, BackupConfig(directory=backup_dir, keep=settings.backup_keep))
+        for shard in shards.shards
+    ]
+    maintenance = [MaintenanceService(shard) for shard in shards.shards]
+
+    async def run_backups(job):
+        for svc in backups:
+            await svc.run_job(job)
+
+    async def run_maintenance(job):
+        for svc in maintenance:
+            await svc.run_job(job)
+
+    runner.register(BACKUP_JOB_TYPE, run_backups)
+    runner.register(MAINTENANCE_JOB_TYPE, run_maintenance)
+
+    now_iso = to_iso(clock.now())
+    await opp_repo.ensure_user(settings.owner_telegram_id, now_iso)
+    await opp_repo.ensure_agent_registered("system", "System", "core", now_iso)
+    await jobs_repo.ensure_recurring(
+        job_id=f"system:{BACKUP_JOB_TYPE}",
+        user_id=settings.owner_telegram_id,
+        agent_id="system",
+        job_type=BACKUP_JOB_TYPE,
+        minutes=settings.backup_interval_minutes,
+        first_due_iso_utc=utc_now_iso(),
+        now_iso=now_iso,
+    )
+    await jobs_repo.ensure_recurring(
+        job_id=f"system:{MAINTENANCE_JOB_TYPE}",
+        user_id=settings.owner_telegram_id,
+        agent_id="system",
+        job_type=MAINTENANCE_JOB_TYPE,
+        minutes=settings.maintenance_interval_minutes,
+        first_due_iso_utc=utc_now_iso(),
+        now_iso=now_iso,
+    )
+
     scheduler = SchedulerLoop(repo=jobs_repo, runner=runner)
     scheduler_task = asyncio.create_task(scheduler.run_forever())
 
@@ -113,6 +174,8 @@ async def main() -> None:
         with contextlib.suppress(asyncio.CancelledError):
             await scheduler_task
         await bot.session.close()
+        await users.close()
+        await shards.close()
 
 
 if __name__ == "__main__":
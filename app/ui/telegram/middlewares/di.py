@@ -6,23 +6,28 @@ from aiogram.types import TelegramObject
 
 from app.domain.oppari.service import OppariService
 from app.infra.db.connection import Database
+from app.infra.db.sharding import ShardedDatabase
+from app.infra.db.users import UserDirectory
 from app.infra.clock.system_clock import SystemClock
 
 
 class DIMiddleware(BaseMiddleware):
     """
     Inject dependencies to handlers.
+    With a ShardedDatabase, `db` is the shard of the user behind the update.
     """
 
     def __init__(
         self,
         oppari_service: OppariService,
-        db: Database,
+        db: Database | ShardedDatabase,
+        users: UserDirectory,
         clock: SystemClock,
         timezone: str,
     ):
         self._opp = oppari_service
         self._db = db
+        self._users = users
         self._clock = clock
         self._tz = timezone
 
@@ -33,7 +38,12 @@ class DIMiddleware(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
         data["opp_service"] = self._opp
-        data["db"] = self._db
+        if isinstance(self._db, ShardedDatabase):
+            user = data.get("event_from_user")
+            data["db"] = self._db.for_user(user.id) if user is not None else self._db.shards[0]
+        else:
+            data["db"] = self._db
+        data["users"] = self._users
         data["clock"] = self._clock
         data["timezone"] = self._tz
         return await handler(event, data)